@@ -0,0 +1,53 @@
+"""
+Time near-duplicate detection over growing numbers of posts, a fifth of
+which are reposts or cross-posts of others, to check it scales linearly.
+
+Run with: python -m benchmarks.dedup
+"""
+
+import random
+import time
+
+import craigslist
+from benchmarks.synthetic import NEIGHBOURHOODS
+from benchmarks.textindex import vocabulary
+
+
+def corpus(size, rand):
+    """ Return `size` posts, about a fifth of them copies of earlier ones. """
+    words = vocabulary(5000, rand)
+    posts = []
+
+    for i in range(size):
+        if posts and rand.random() < 0.2:
+            original = rand.choice(posts)
+            desc = original['desc'].upper()
+            location = original['location']
+            price = original['price']
+        else:
+            desc = u' '.join(words[int(len(words) ** rand.random()) - 1]
+                             for j in range(rand.randint(4, 10)))
+            location = u'(%s)' % rand.choice(NEIGHBOURHOODS)
+            price = float(rand.randint(400, 4000))
+
+        posts.append(craigslist.HousingPost(
+            link='http://portland.craigslist.org/apa/%d.html' % i,
+            desc=desc, location=location, price=price))
+
+    return posts
+
+
+def main():
+    rand = random.Random(0)
+
+    for size in (10000, 20000, 40000):
+        posts = corpus(size, rand)
+        start = time.time()
+        kept = sum(1 for post in craigslist.DuplicateFilter().filter(posts))
+        elapsed = time.time() - start
+        print '%6d posts: %6d kept, %5.2fs, %6.0f posts/sec' % (
+            size, kept, elapsed, size / elapsed)
+
+
+if __name__ == '__main__':
+    main()
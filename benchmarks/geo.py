@@ -0,0 +1,54 @@
+"""
+Compare `GeoIndex` radius queries with scanning every post, over a metro
+area's worth of housing listings.
+
+Run with: python -m benchmarks.geo
+"""
+
+import random
+import time
+
+import craigslist
+from craigslist.geo import distance
+
+
+def listings(size):
+    """ Return `size` random housing posts spread over the Portland area. """
+    rand = random.Random(0)
+    return [craigslist.HousingPost(
+        link='http://portland.craigslist.org/mlt/apa/%d.html' % (3000000000 + i),
+        price=float(rand.randint(400, 4000)),
+        bedrooms=rand.randint(0, 5),
+        latitude=45.3 + rand.random() * 0.4,
+        longitude=-122.9 + rand.random() * 0.5) for i in range(size)]
+
+
+def main():
+    posts = listings(200000)
+    rand = random.Random(1)
+    points = [(45.4 + rand.random() * 0.2, -122.8 + rand.random() * 0.3)
+              for i in range(50)]
+    filters = craigslist.Filter({'min_rooms': 1, 'max_rooms': 3,
+                                 'max_price': 1500})
+
+    start = time.time()
+    index = craigslist.GeoIndex(posts)
+    print 'indexed %d posts in %.2fs' % (len(index), time.time() - start)
+
+    def scan(latitude, longitude):
+        return [post for post in posts
+                if distance(latitude, longitude, post['latitude'],
+                            post['longitude']) <= 2 and filters(post)]
+
+    for name, query in [
+            ('linear scan', scan),
+            ('GeoIndex', lambda lat, lon: index.within(lat, lon, 2, filters))]:
+        start = time.time()
+        found = sum(len(query(lat, lon)) for lat, lon in points)
+        elapsed = time.time() - start
+        print '%-12s %8.1f queries/sec, %d matches' % (
+            name, len(points) / elapsed, found)
+
+
+if __name__ == '__main__':
+    main()
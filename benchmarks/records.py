@@ -0,0 +1,37 @@
+"""
+Compare the memory used by post records with the dicts extractors used to
+return.
+
+Run with: python -m benchmarks.records
+"""
+
+import sys
+
+import craigslist
+
+
+def main():
+    fields = {
+        'date': 'Jun  7',
+        'link': 'http://portland.craigslist.org/mlt/apa/3064412526.html',
+        'desc': '$800 / 1br - 700ft - Great apartment near Alberta Arts',
+        'location': '(1736 NE Killingsworth St.)',
+        'category': 'apts/housing for rent',
+        'image': False,
+        'price': 800.0,
+        'bedrooms': 1,
+        'sqft': 700
+    }
+
+    # Field values are shared by both, so only the containers differ.
+    old = sys.getsizeof(dict(fields))
+    new = sys.getsizeof(craigslist.HousingPost(**fields))
+
+    print 'dict:        %5d bytes per post' % old
+    print 'HousingPost: %5d bytes per post' % new
+    print 'saved:       %5d bytes per post, %.1f MB per million posts' % (
+        old - new, (old - new) * 1e6 / 2 ** 20)
+
+
+if __name__ == '__main__':
+    main()
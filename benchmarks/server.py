@@ -0,0 +1,91 @@
+"""
+A local HTTP server standing in for Craigslist in benchmarks.
+"""
+
+import BaseHTTPServer
+import socket
+import SocketServer
+import threading
+
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        html = self.server.pages.get(self.server.location + self.path[1:])
+        self.server.requests += 1
+
+        if html is None:
+            self.send_response(404)
+            body = ''
+        else:
+            self.send_response(200)
+            body = html.encode('utf-8')
+
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+
+    daemon_threads = True
+
+    def __init__(self, *args):
+        BaseHTTPServer.HTTPServer.__init__(self, *args)
+        self.connections = set()
+
+    def process_request(self, request, client_address):
+        self.connections.add(request)
+        SocketServer.ThreadingMixIn.process_request(self, request,
+                                                    client_address)
+
+    def shutdown_request(self, request):
+        self.connections.discard(request)
+        BaseHTTPServer.HTTPServer.shutdown_request(self, request)
+
+    def close_connections(self):
+        """ Hang up on clients holding keep-alive connections open. """
+        for request in list(self.connections):
+            try:
+                request.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+
+
+class PageServer(object):
+    """
+    Serve `pages`, a dict mapping URLs under `location` to HTML, over HTTP on
+    a free local port. `location` is only known once the server has started,
+    so pages are usually added after creating it.
+    """
+
+    def __init__(self, pages=None):
+        self.server = Server(('127.0.0.1', 0), Handler)
+        self.location = 'http://127.0.0.1:%d/' % self.server.server_address[1]
+        self.server.location = self.location
+        self.server.pages = self.pages = pages or {}
+        self.server.requests = 0
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    @property
+    def requests(self):
+        return self.server.requests
+
+    def close(self):
+        self.server.shutdown()
+        self.server.close_connections()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,107 @@
+"""
+Measure how long importing the package takes, and what it drags in, in
+fresh interpreters.
+
+Python 2 has no `-X importtime`, so each run wraps `__import__` to time
+every module the first time it is loaded, and prints the slowest ones by
+their own time (excluding the modules they import) and cumulatively, like
+`-X importtime` does.
+
+Run with: python -m benchmarks.startup
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+
+# Modules that are slow to import and that importing the package, or its
+# parsing-only part, shouldn't load.
+HEAVY = ('requests', 'BeautifulSoup', 'multiprocessing', 'Queue', 'ssl')
+
+# The optional storage and indexing subsystems, and the modules they need,
+# which the package imports only when they are first used.
+STORAGE = ('sqlite3', 'json', 'hashlib', 'zlib', 'craigslist.cache',
+           'craigslist.columns', 'craigslist.dedup', 'craigslist.details',
+           'craigslist.geo', 'craigslist.pipeline', 'craigslist.scheduler',
+           'craigslist.seen', 'craigslist.store', 'craigslist.sweep',
+           'craigslist.textindex')
+
+TARGETS = ('craigslist', 'craigslist.parsing')
+
+SCRIPT = r'''
+import __builtin__
+import sys
+import time
+
+times = {}
+stack = [0.0]
+original = __builtin__.__import__
+
+
+def timed_import(name, *args, **kwargs):
+    loaded = set(sys.modules)
+    stack.append(0.0)
+    start = time.time()
+    try:
+        return original(name, *args, **kwargs)
+    finally:
+        total = time.time() - start
+        inner = stack.pop()
+        stack[-1] += total
+        # An implicit relative import of `name` loads `package.name`.
+        new = [module for module in sys.modules if module not in loaded
+               and sys.modules[module] is not None
+               and (module == name or module.endswith('.' + name))]
+        if new:
+            times[min(new, key=len)] = (total - inner, total)
+
+__builtin__.__import__ = timed_import
+start = time.time()
+__import__(sys.argv[1])
+total = time.time() - start
+__builtin__.__import__ = original
+modules = sorted(sys.modules)
+
+# Imported only now, so that it isn't counted as loaded by the target.
+import json
+json.dump({'total': total, 'times': times,
+           'modules': modules}, sys.stdout)
+'''
+
+
+def measure(target, repeat=5):
+    """
+    Import `target` in `repeat` fresh interpreters, and return the results
+    of the fastest run.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    runs = []
+
+    for i in range(repeat):
+        output = subprocess.check_output(
+            [sys.executable, '-c', SCRIPT, target], cwd=root)
+        runs.append(json.loads(output))
+
+    return min(runs, key=lambda run: run['total'])
+
+
+def main():
+    for target in TARGETS:
+        run = measure(target)
+        heavy = [name for name in HEAVY if name in run['modules']]
+        storage = [name for name in STORAGE if name in run['modules']]
+
+        print 'import %s: %.1f ms, %d modules, heavy: %s, storage: %s' % (
+            target, run['total'] * 1000, len(run['modules']),
+            ', '.join(heavy) or 'none', ', '.join(storage) or 'none')
+
+        print '  %8s %8s  module' % ('self', 'cumul.')
+        slowest = sorted(run['times'].items(), key=lambda item: -item[1][0])
+        for name, (own, total) in slowest[:10]:
+            print '  %6.1fms %6.1fms  %s' % (own * 1000, total * 1000, name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Time appending posts to a `PostStore` in batches, against one transaction
+per post, and slicing the result by the indexed columns.
+
+Run with: python -m benchmarks.store
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import craigslist
+from benchmarks.synthetic import MONTHS, NEIGHBOURHOODS, WORDS
+
+
+CATEGORIES = [u'apts/housing for rent', u'rooms & shares', u'sublets']
+
+
+def listings(size, start=3000000000):
+    rand = random.Random(0)
+    for i in range(size):
+        yield craigslist.HousingPost(
+            link='http://portland.craigslist.org/mlt/apa/%d.html' % (start + i),
+            date='%s %2d' % (rand.choice(MONTHS), rand.randint(1, 28)),
+            desc=u' '.join(rand.choice(WORDS) for j in range(6)),
+            location=u'(%s)' % rand.choice(NEIGHBOURHOODS),
+            category=rand.choice(CATEGORIES), image=rand.random() < 0.6,
+            price=float(rand.randint(400, 4000)),
+            bedrooms=rand.randint(0, 5), sqft=rand.randint(150, 3500))
+
+
+def main():
+    path = tempfile.mkdtemp()
+
+    try:
+        store = craigslist.PostStore(os.path.join(path, 'one.db'))
+        start = time.time()
+        for post in listings(2000):
+            store.put([post])
+        print 'one per transaction: %8.0f posts/sec' % (
+            2000 / (time.time() - start))
+
+        store = craigslist.PostStore(os.path.join(path, 'posts.db'))
+        size = 500000
+        start = time.time()
+        store.put(listings(size))
+        print 'batched:             %8.0f posts/sec (%d posts)' % (
+            size / (time.time() - start), size)
+
+        start = time.time()
+        store.put(listings(10000, 3000000000 + size))
+        print 'append 10k more:     %8.2fs' % (time.time() - start)
+
+        for name, filters, category in [
+                ('price band', {'min_price': 1000, 'max_price': 1010}, None),
+                ('category + price', {'max_price': 420}, u'sublets'),
+                ('date', {'since': 'Jul  3', 'until': 'Jul  3'}, None)]:
+            start = time.time()
+            posts = store.query(filters, category, order_by='price',
+                                limit=1000)
+            print '%-20s %8.1f ms (%d posts)' % (
+                name, (time.time() - start) * 1000, len(posts))
+    finally:
+        shutil.rmtree(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Generate synthetic Craigslist search result pages for benchmarks.
+"""
+
+import random
+
+import craigslist
+
+
+SALE_ROW = u"""
+        <p class="row">
+            <span class="ih" id="images:%(image_id)s.jpg">&nbsp;</span>
+            <span class="itemdate"> %(date)s</span>
+            <a href="%(location)s%(area)s/sys/%(id)d.html">%(desc)s</a>
+            <span class="itemsep"> - </span>
+            <span class="itemph"></span>
+            <span class="itempp"> $%(price)d</span>
+            <span class="itempn"><font size="-1"> (%(neighbourhood)s)</font></span>
+            <span class="itempx">%(pic)s</span>
+            <span class="itemcg"> <small class="gc"><a href="/sys/">computers - by owner</a></small></span><br class="c">
+        </p>"""
+
+HOUSING_ROW = u"""
+        <p class="row" data-latitude="%(lat).6f" data-longitude="%(lon).6f">
+            <span class="ih" id="images:%(image_id)s.jpg">&nbsp;</span>
+            <span class="itemdate"> %(date)s</span>
+            <span class="itemsep"> - </span>
+            <a href="%(location)s%(area)s/apa/%(id)d.html">%(desc)s</a>
+            <span class="itemsep"> - </span>
+            <span class="itemph">$%(price)d / %(bedrooms)dbr - %(sqft)dft&sup2; - </span>
+            <span class="itempp"></span>
+            <span class="itempn"><font size="-1"> (%(neighbourhood)s)</font></span>
+            <span class="itemcg" title="apa"> <small class="gc"><a href="/apa/">apts/housing for rent</a></small></span>
+            <span class="itempx">%(pic)s</span>
+            <br class="c">
+        </p>"""
+
+JOB_ROW = u"""
+        <p class="row">
+            <span class="itemdate"> %(date)s</span>
+            <span class="itemsep"> - </span>
+            <a href="%(location)s%(area)s/sof/%(id)d.html">%(desc)s</a>
+            <span class="itemsep"> - </span>
+            <span class="itempn"><font size="-1"> (%(neighbourhood)s)</font></span>
+            <span class="itempx">%(pic)s</span>
+            <span class="itemcg"> <small class="gc"><a href="/sof/">software/QA/DBA/etc</a></small></span>
+        </p>"""
+
+ROWS = {
+    'sss': SALE_ROW,
+    'hhh': HOUSING_ROW,
+    'jjj': JOB_ROW
+}
+
+WORDS = (u'great sunny quiet modern vintage large cozy new used laptop desk '
+         u'bike apartment house room near park downtown engineer senior qa '
+         u'developer remote part time'.split())
+
+NEIGHBOURHOODS = [u'Kelso', u'Ne Portland', u'Alberta/Concordia', u'Tigard',
+                  u'Dekum - Alberta', u'1736 NE Killingsworth St.']
+
+MONTHS = ['Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+
+def row(category, id, location, rand):
+    """ Return the HTML of a random result row for a post in `category`. """
+    pic = rand.random() < 0.6
+    return ROWS[category] % {
+        'id': id,
+        'location': location,
+        'area': rand.choice(['mlt', 'clk', 'wsc', 'yam']),
+        'image_id': '%x' % rand.getrandbits(64),
+        'date': '%s %2d' % (rand.choice(MONTHS), rand.randint(1, 28)),
+        'desc': u' '.join(rand.choice(WORDS)
+                          for i in range(rand.randint(3, 9))).capitalize(),
+        'price': rand.randint(5, 5000),
+        'bedrooms': rand.randint(0, 5),
+        'sqft': rand.randint(150, 3500),
+        'lat': 45.5 + rand.random() * 0.2,
+        'lon': -122.7 + rand.random() * 0.2,
+        'neighbourhood': rand.choice(NEIGHBOURHOODS),
+        'pic': u' <span class="p"> pic</span>' if pic else u''
+    }
+
+
+def result_page(category, ids, location, next_url=None, seed=0):
+    """
+    Return a search results page with a random row in `category` for each
+    post ID in `ids`, linking to `next_url` if given.
+    """
+    rand = random.Random(seed)
+    rows = u''.join(row(category, id, location, rand) for id in ids)
+
+    if next_url:
+        rows += u'\n        <h4><a href="%s"><b>Next &gt;&gt;</b></a></h4>' % (
+            next_url.replace('&', '&amp;'))
+
+    return (u'<html><head><title>craigslist: search</title></head><body>\n'
+            u'<blockquote><form action="/search/"></form></blockquote>\n'
+            u'<blockquote>%s\n</blockquote>\n</body></html>' % rows)
+
+
+def result_chain(location, category, query, pages, rows, seed=0):
+    """
+    Return a dict mapping the URLs of a chain of `pages` search result pages
+    for `query` in `category` at `location`, each with `rows` posts, to their
+    HTML.
+    """
+    first = craigslist.get_search_url(location, category, query)
+    urls = [first] + [craigslist.get_page_url(first, page * rows)
+                      for page in range(1, pages)]
+    result = {}
+
+    for page, url in enumerate(urls):
+        ids = range(3000000000 + page * rows, 3000000000 + (page + 1) * rows)
+        next_url = urls[page + 1] if page + 1 < pages else None
+        result[url] = result_page(category, ids, location, next_url,
+                                  seed + page)
+
+    return result
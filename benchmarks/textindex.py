@@ -0,0 +1,87 @@
+"""
+Time `TextIndex` queries over a corpus of harvested posts, against
+checking every post.
+
+Run with: python -m benchmarks.textindex
+"""
+
+import random
+import string
+import time
+
+import craigslist
+from benchmarks.synthetic import NEIGHBOURHOODS, WORDS
+from craigslist.textindex import tokenize
+
+
+def vocabulary(size, rand):
+    """ Return `size` words, the common ones from the synthetic pages. """
+    words = list(WORDS)
+    while len(words) < size:
+        words.append(''.join(rand.choice(string.ascii_lowercase)
+                             for i in range(rand.randint(3, 9))))
+    return words
+
+
+def corpus(size):
+    """
+    Return `size` random housing posts whose words are drawn so that a few
+    are very common and most are rare, like real titles.
+    """
+    rand = random.Random(0)
+    words = vocabulary(5000, rand)
+
+    def word():
+        return words[int(len(words) ** rand.random()) - 1]
+
+    return [craigslist.HousingPost(
+        link='http://portland.craigslist.org/mlt/apa/%d.html' % (3000000000 + i),
+        desc=u' '.join(word() for j in range(rand.randint(3, 9))).capitalize(),
+        location=u'(%s)' % rand.choice(NEIGHBOURHOODS),
+        category=u'apts/housing for rent',
+        price=float(rand.randint(400, 4000)),
+        bedrooms=rand.randint(0, 5)) for i in range(size)]
+
+
+def main():
+    posts = corpus(100000)
+
+    start = time.time()
+    index = craigslist.TextIndex(posts)
+    print 'indexed %d posts in %.2fs' % (len(index), time.time() - start)
+
+    filters = craigslist.Filter({'min_rooms': 1, 'max_rooms': 3,
+                                 'max_price': 1500})
+
+    def has(*words):
+        return lambda post: set(words) <= set(tokenize(post['desc']))
+
+    queries = [
+        ('house near', has('house', 'near')),
+        ('desk bike location:alberta', lambda post: has('desk', 'bike')(
+            post) and 'alberta' in post['location'].lower()),
+        ('"sunny quiet"', lambda post: 'sunny quiet' in u' '.join(
+            tokenize(post['desc']))),
+        ('(loft OR studio) -remote', lambda post: False),
+        ('laptop OR bike', lambda post: has('laptop')(post)
+         or has('bike')(post))
+    ]
+
+    for query, scan in queries:
+        repeat = 100
+        start = time.time()
+        for i in range(repeat):
+            found = index.search(query, filters)
+        indexed = (time.time() - start) / repeat
+
+        start = time.time()
+        scanned = [post for post in posts if scan(post) and filters(post)]
+        scanned_time = time.time() - start
+
+        print '%-30s %5d matches %7.3f ms, scan %7.1f ms (%d)' % (
+            query, len(found), indexed * 1000, scanned_time * 1000,
+            len(scanned))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Measure parsing and search throughput against synthetic result pages.
+
+Run with: python -m benchmarks.throughput [--rows N] [--pages N]
+
+Reports rows/sec for parsing with each parser, pages/sec for `search`
+end to end against a local HTTP server and an in-memory transport, and the
+memory held by 10,000 extracted posts.
+"""
+
+import optparse
+import sys
+import time
+
+import craigslist
+from craigslist.client import StaticTransport
+
+from benchmarks.server import PageServer
+from benchmarks.synthetic import result_chain, result_page
+
+LOCATION = 'http://portland.craigslist.org/'
+
+
+def best_of(fn, repeat=3):
+    """ Return the shortest of `repeat` timings of calling `fn`. """
+    times = []
+    for i in range(repeat):
+        start = time.time()
+        fn()
+        times.append(time.time() - start)
+    return min(times)
+
+
+def deep_size(posts):
+    """
+    Return the bytes used by `posts`, their containers and values, counting
+    each object once.
+    """
+    seen = set()
+    total = sys.getsizeof(posts)
+
+    for post in posts:
+        for obj in [post] + post.values():
+            if id(obj) not in seen:
+                seen.add(id(obj))
+                total += sys.getsizeof(obj)
+
+    return total
+
+
+def bench_parsing(rows):
+    print 'Parsing, %d-row pages' % rows
+
+    for category in ('sss', 'hhh', 'jjj'):
+        html = result_page(category, range(rows), LOCATION)
+
+        for parser in sorted(craigslist.parsers):
+            seconds = best_of(lambda: craigslist.get_posts_for_category(
+                category, LOCATION, html, parser=parser))
+            print '  %s %-5s %10.0f rows/sec' % (category, parser,
+                                                 rows / seconds)
+
+
+def bench_search(pages, rows):
+    print 'Search, %d pages of %d rows' % (pages, rows)
+
+    with PageServer() as server:
+        server.pages.update(result_chain(server.location, 'hhh', 'house',
+                                         pages, rows))
+        transports = [
+            ('http', server.location, None),
+            ('memory', LOCATION, StaticTransport(
+                result_chain(LOCATION, 'hhh', 'house', pages, rows)))
+        ]
+
+        for name, location, transport in transports:
+            for workers in (None, 4):
+                client = craigslist.Client(transport)
+                seconds = best_of(lambda: craigslist.search(
+                    location, 'hhh', 'house', workers=workers, client=client))
+                print '  %-6s workers=%-4s %8.1f pages/sec' % (
+                    name, workers, pages / seconds)
+
+
+def bench_memory(posts):
+    html = result_page('hhh', range(posts), LOCATION)
+    result = craigslist.get_posts_for_category('hhh', LOCATION, html)
+    print 'Memory, %d housing posts' % posts
+    print '  %.2f MB, %d bytes per post' % (
+        deep_size(result) / 2.0 ** 20, deep_size(result) / len(result))
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('--rows', type='int', default=500,
+                      help='rows per result page')
+    parser.add_option('--pages', type='int', default=20,
+                      help='pages per search')
+    options, args = parser.parse_args()
+
+    bench_parsing(options.rows)
+    bench_search(options.pages, 100)
+    bench_memory(10000)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Compare `get_housing_details` with the split-based parsing `extract_housing`
+used to do, over a corpus of housing titles.
+
+Run with: python -m benchmarks.titles
+"""
+
+import random
+import re
+import timeit
+
+import craigslist
+
+
+def old_housing_details(details):
+    """ The old path: a regex compiled per call, then split on '/' and '-'. """
+    money = re.compile('|'.join([
+        r'\$?(\d*\.\d{1,2})$',
+        r'\$?(\d+)$',
+        r'\$(\d+\.?)',
+    ]))
+    matches = money.search(details)
+    price = matches and matches.group(0) or None
+    price = float(price[1:]) if price else None
+    bedrooms = sqft = None
+
+    if '/' in details:
+        for detail in details.split('/')[1].split('-'):
+            detail = detail.strip()
+
+            if 'ft' in detail:
+                match = re.match(r'\d+', detail)
+                if match:
+                    sqft = int(match.group(0))
+            elif 'br' in detail:
+                try:
+                    bedrooms = int(detail.lower().split('br')[0])
+                except ValueError:
+                    bedrooms = 0
+
+    return price, bedrooms, sqft
+
+
+def corpus(size, distinct):
+    """
+    Return `size` housing titles drawn from `distinct` different ones, since
+    the same listings show up poll after poll.
+    """
+    rand = random.Random(0)
+    names = ['Great apartment near Alberta Arts', 'Beautiful 4 Bedroom Home',
+             'Sunny studio, walk to MAX', 'Quiet room in shared house']
+    titles = []
+
+    for i in range(distinct):
+        price = rand.randint(300, 5000)
+        if rand.random() < 0.1:
+            title = ''
+        elif price >= 1000 and rand.random() < 0.3:
+            title = '$%d,%03d' % divmod(price, 1000)
+        else:
+            title = '$%d' % price
+        details = []
+        if rand.random() < 0.8:
+            details.append('%dbr' % rand.randint(0, 5))
+        if rand.random() < 0.5:
+            details.append(u'%dft\xb2' % rand.randint(150, 3500))
+        if details:
+            title += ' / ' + ' - '.join(details) + ' -'
+        titles.append(u'%s %s' % (title, rand.choice(names)))
+
+    return [rand.choice(titles) for i in range(size)]
+
+
+def main():
+    titles = corpus(100000, 5000)
+    same = sum(old_housing_details(t) == craigslist.get_housing_details(t)
+               for t in set(titles))
+    print '%d of %d distinct titles parse the same' % (same, len(set(titles)))
+
+    def run(fn):
+        for title in titles:
+            fn(title)
+
+    def cold():
+        module = craigslist.parsing
+        size = module.HOUSING_DETAILS_CACHE_SIZE
+        module.HOUSING_DETAILS_CACHE_SIZE = 0
+        module.housing_details_cache.clear()
+        try:
+            run(craigslist.get_housing_details)
+        finally:
+            module.HOUSING_DETAILS_CACHE_SIZE = size
+
+    for name, fn in [('old', lambda: run(old_housing_details)),
+                     ('new, no memo', cold),
+                     ('new, memoized', lambda: run(
+                         craigslist.get_housing_details))]:
+        best = min(timeit.repeat(fn, number=1, repeat=3))
+        print '%-14s %8.0f titles/sec' % (name, len(titles) / best)
+
+
+if __name__ == '__main__':
+    main()
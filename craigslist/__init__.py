@@ -1,2 +1,65 @@
+"""
+craigslist: Search Craigslist and parse its pages.
+
+The optional subsystems (caching, storage, indexing and the rest) pull in
+sqlite3, json, hashlib, zlib and friends, so they are imported the first
+time one of their names is used rather than with the package. Importing the
+package, or `craigslist.parsing`, loads only searching and parsing.
+
+Copyright (c) 2012 Andrew Brookins. All Rights Reserved.
+"""
+
+import sys
+import types
+
 from craigslist import *
 
+
+# The names each optional subsystem provides to the package.
+LAZY = {
+    'cache': ('ResponseCache',),
+    'columns': ('Columns', 'to_columns'),
+    'dedup': ('DuplicateFilter', 'cluster_duplicates'),
+    'details': ('DetailCache', 'fetch_details', 'parse_details'),
+    'geo': ('GeoIndex',),
+    'pipeline': ('search_pipeline',),
+    'scheduler': ('Scheduler',),
+    'seen': ('SeenIndex', 'iter_new_posts'),
+    'store': ('PostStore',),
+    'sweep': ('Sweep',),
+    'textindex': ('TextIndex',),
+}
+
+
+class LazyPackage(types.ModuleType):
+    """
+    The package, importing an optional subsystem when one of its names, or
+    the subsystem itself, is first looked up.
+    """
+
+    def __getattr__(self, name):
+        for module, names in LAZY.items():
+            if name == module or name in names:
+                path = '%s.%s' % (self.__name__, module)
+                __import__(path)
+                value = sys.modules[path]
+                if name != module:
+                    value = getattr(value, name)
+                setattr(self, name, value)
+                return value
+
+        raise AttributeError("'module' object has no attribute %r" % name)
+
+
+# So that `from craigslist import *` still gets the optional subsystems' names.
+__all__ = sorted(
+    [name for name in globals().keys() if not name.startswith('_') and
+     name not in ('sys', 'types', 'LAZY', 'LazyPackage')] +
+    [name for names in LAZY.values() for name in names])
+
+_package = LazyPackage(__name__, __doc__)
+_package.__dict__.update(globals())
+# Python 2 clears a module's globals when it is freed, and `LazyPackage`
+# still uses these ones.
+_package._module = sys.modules[__name__]
+sys.modules[__name__] = _package
@@ -0,0 +1,151 @@
+"""
+cache: An on-disk cache of Craigslist responses.
+
+Copyright (c) 2012 Andrew Brookins. All Rights Reserved.
+"""
+
+import sqlite3
+import threading
+import time
+import urlparse
+import zlib
+
+from client import StaticResponse
+
+
+def normalize_url(url):
+    """
+    Return `url` with a lowercase scheme and host and its query arguments
+    sorted, so that equivalent search URLs share a cache entry.
+    """
+    import urllib
+
+    scheme, netloc, path, params, query, fragment = urlparse.urlparse(url)
+    args = sorted(urlparse.parse_qsl(query, keep_blank_values=True))
+
+    return urlparse.urlunparse((scheme.lower(), netloc.lower(), path or '/',
+                                params, urllib.urlencode(args), ''))
+
+
+class ResponseCache(object):
+    """
+    Cache response bodies in the SQLite database at `path`, compressed.
+
+    A response is fresh for `ttl` seconds after it was fetched. After that, if
+    the server sent an ETag or Last-Modified header, `Client` asks the server
+    whether it has changed instead of downloading it again. When the cached
+    bodies take up more than `max_size` bytes, the least recently used ones
+    are dropped.
+
+    `hits` counts responses served fresh from the cache, `revalidations`
+    responses served from the cache after the server said they were
+    unchanged, and `misses` lookups that needed a request.
+    """
+
+    def __init__(self, path, ttl=300, max_size=64 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                body BLOB,
+                size INTEGER,
+                etag TEXT,
+                last_modified TEXT,
+                fetched REAL,
+                accessed REAL
+            );
+            CREATE INDEX IF NOT EXISTS responses_accessed
+                ON responses (accessed);
+        ''')
+        self.size = self.db.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def get(self, url):
+        """
+        Look up `url` and return a (response, fresh) tuple, or (None, False)
+        if it isn't cached.
+        """
+        url = normalize_url(url)
+        now = time.time()
+
+        with self.lock:
+            row = self.db.execute(
+                'SELECT body, etag, last_modified, fetched FROM responses '
+                'WHERE url = ?', (url,)).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None, False
+
+            body, etag, last_modified, fetched = row
+            fresh = now - fetched < self.ttl
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+            self.db.execute('UPDATE responses SET accessed = ? WHERE url = ?',
+                            (now, url))
+            self.db.commit()
+
+        headers = {}
+        if etag:
+            headers['etag'] = etag
+        if last_modified:
+            headers['last-modified'] = last_modified
+
+        response = StaticResponse(url, 200, zlib.decompress(body).decode(
+            'utf-8'), headers)
+        response.from_cache = True
+
+        return response, fresh
+
+    def put(self, url, response):
+        """ Cache `response`, the response for `url`. """
+        url = normalize_url(url)
+        body = buffer(zlib.compress(response.text.encode('utf-8')))
+        now = time.time()
+
+        with self.lock:
+            row = self.db.execute('SELECT size FROM responses WHERE url = ?',
+                                  (url,)).fetchone()
+            if row:
+                self.size -= row[0]
+
+            self.db.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (url, body, len(body), response.headers.get('etag'),
+                 response.headers.get('last-modified'), now, now))
+            self.size += len(body)
+            self.evict()
+            self.db.commit()
+
+    def revalidated(self, url):
+        """ Mark the cached response for `url` as fresh again. """
+        with self.lock:
+            self.revalidations += 1
+            self.db.execute('UPDATE responses SET fetched = ? WHERE url = ?',
+                            (time.time(), normalize_url(url)))
+            self.db.commit()
+
+    def evict(self):
+        """ Drop least recently used responses until under `max_size`. """
+        while self.size > self.max_size:
+            url, size = self.db.execute(
+                'SELECT url, size FROM responses ORDER BY accessed '
+                'LIMIT 1').fetchone()
+            self.db.execute('DELETE FROM responses WHERE url = ?', (url,))
+            self.size -= size
+
+    def clear(self):
+        """ Drop every cached response. """
+        with self.lock:
+            self.db.execute('DELETE FROM responses')
+            self.db.commit()
+            self.size = 0
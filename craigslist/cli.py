@@ -0,0 +1,355 @@
+"""
+cli: The `craigslist` command, which runs a file of searches and streams the
+posts found as newline-delimited JSON.
+
+Copyright (c) 2012 Andrew Brookins. All Rights Reserved.
+"""
+
+import gzip
+import json
+import optparse
+import os
+import sys
+import threading
+import time
+
+from cache import ResponseCache
+from client import Client
+from craigslist import (SEARCH_ALL, SEARCH_TITLES, compile_filters,
+                        interleave_by_host, iter_search, parsers)
+from filters import RANGES
+from metrics import Metrics
+from scheduler import Scheduler
+
+
+USAGE = '''%prog [options] JOBFILE
+
+Run each search in JOBFILE ('-' for standard input) and write the posts found
+as JSON, one per line. Each line of JOBFILE is a search: its location,
+category and query, then any filters as name=value fields, like
+
+    http://portland.craigslist.org/ hhh house max_price=1500 image=1
+
+with the fields separated by tabs, or a JSON object with "location",
+"category", "query" and "filters" keys. Blank lines and lines starting with
+'#' are skipped. Searches are numbered from 0 in the order they appear.'''
+
+# How often, in seconds, posts written to files are flushed to them. Posts
+# written to standard output, uncompressed, are flushed as they are written.
+FLUSH_INTERVAL = 1.0
+
+TRUE = ('1', 'true', 'yes')
+FALSE = ('0', 'false', 'no')
+
+
+def get_filter_value(name, value):
+    """
+    Return `value`, given for the filter `name` as a string or a JSON value,
+    with numeric bounds as numbers, `image` as a bool and the rest as text.
+    """
+    if value is None:
+        return
+
+    if isinstance(value, str):
+        value = value.decode('utf-8')
+
+    if name in RANGES:
+        if isinstance(value, bool) or not isinstance(
+                value, (int, long, float, unicode)):
+            raise ValueError('%s must be a number, not %r.' % (name, value))
+        return float(value)
+
+    if name == 'image':
+        if isinstance(value, bool):
+            return value
+        if unicode(value).lower() not in TRUE + FALSE:
+            raise ValueError('image must be true or false, not %r.' % value)
+        return unicode(value).lower() in TRUE
+
+    if not isinstance(value, unicode):
+        raise ValueError('%s must be text, not %r.' % (name, value))
+
+    return value
+
+
+def parse_filter(field):
+    """
+    Return the (name, value) of the filter `field`, a string like
+    'max_price=1500', converted by `get_filter_value`.
+    """
+    name, sep, value = field.partition('=')
+
+    if not sep:
+        raise ValueError('Filters look like name=value, not %r.' % field)
+
+    return name, get_filter_value(name, value)
+
+
+def read_jobs(lines):
+    """
+    Return a list of the searches in job file `lines`, each a (location,
+    category, query, filters) tuple with its filters compiled, raising
+    ValueError naming the line of the first bad one.
+    """
+    jobs = []
+
+    for number, line in enumerate(lines, 1):
+        line = line.rstrip('\r\n')
+
+        if not line.strip() or line.lstrip().startswith('#'):
+            continue
+
+        try:
+            if line.lstrip().startswith('{'):
+                row = json.loads(line)
+                if not isinstance(row, dict):
+                    raise ValueError('Expected a JSON object.')
+                filters = row.get('filters') or {}
+                if not isinstance(filters, dict):
+                    raise ValueError('filters must be a JSON object.')
+                job = (row['location'], row['category'], row.get('query', u''),
+                       dict((name, get_filter_value(name, value))
+                            for name, value in filters.items()))
+            else:
+                fields = line.split('\t')
+                if len(fields) < 3:
+                    raise ValueError('Expected location, category and query.')
+                job = tuple(field.decode('utf-8') for field in fields[:3]) + (
+                    dict(map(parse_filter, fields[3:])),)
+
+            jobs.append(job[:3] + (compile_filters(job[3]),))
+        except (KeyError, ValueError), e:
+            raise ValueError('Line %d: %s' % (number, e))
+
+    return jobs
+
+
+def run_jobs(jobs, workers=8, search_type=SEARCH_ALL, client=None,
+             parser=None, metrics=None, queue_size=1000):
+    """
+    Run each search in `jobs`, a list of (location, category, query, filters)
+    tuples, on `workers` threads, and yield a (number, post) tuple for each
+    post as it arrives, where `number` is the index of its search in `jobs`.
+
+    A search that fails yields its exception instead of a post, and the
+    other searches carry on. Searches of the same location are spread out,
+    and at most `queue_size` posts are held waiting to be consumed.
+    """
+    import Queue
+
+    todo = Queue.Queue()
+    for job in interleave_by_host([job + (number,)
+                                   for number, job in enumerate(jobs)]):
+        todo.put(job)
+
+    results = Queue.Queue(queue_size)
+
+    def work():
+        while True:
+            try:
+                location, category, query, filters, number = todo.get_nowait()
+            except Queue.Empty:
+                results.put(None)
+                return
+
+            try:
+                for post in iter_search(location, category, query,
+                                        search_type, filters, client=client,
+                                        parser=parser, metrics=metrics):
+                    results.put((number, post))
+            except Exception, e:
+                results.put((number, e))
+
+    threads = [threading.Thread(target=work)
+               for i in range(max(1, min(workers, len(jobs))))]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    running = len(threads)
+    while running:
+        result = results.get()
+
+        if result is None:
+            running -= 1
+        else:
+            yield result
+
+
+class Output(object):
+    """
+    Write posts as lines of JSON to the file at `path` ('-' for standard
+    output), or, if `directory` is given, to a file per search in it named
+    after the search's number. With `compress`, the output is gzipped.
+    """
+
+    def __init__(self, path='-', directory=None, compress=False):
+        self.path = path
+        self.directory = directory
+        self.compress = compress
+        self.files = {}
+
+    def open(self, path):
+        if path == '-':
+            if self.compress:
+                return gzip.GzipFile(fileobj=sys.stdout, mode='wb')
+            return sys.stdout
+
+        if self.compress:
+            return gzip.open(path, 'wb')
+        return open(path, 'wb')
+
+    def get_file(self, number):
+        key = number if self.directory else None
+
+        if key not in self.files:
+            if self.directory:
+                path = os.path.join(self.directory, '%d.ndjson%s' % (
+                    number, '.gz' if self.compress else ''))
+            else:
+                path = self.path
+            self.files[key] = self.open(path)
+
+        return self.files[key]
+
+    def write(self, number, post, search):
+        """
+        Write `post`, found by the search numbered `number`, along with
+        `search`, that search's [location, category, query].
+        """
+        record = dict(post)
+        record['search'] = search
+        file = self.get_file(number)
+        file.write(json.dumps(record) + '\n')
+
+        if file is sys.stdout:
+            file.flush()
+
+    def flush(self):
+        for file in self.files.values():
+            file.flush()
+
+    def close(self):
+        for file in self.files.values():
+            if file is sys.stdout:
+                file.flush()
+            else:
+                file.close()
+        self.files = {}
+        sys.stdout.flush()
+
+
+def get_summary(searches, posts, failed, seconds, metrics):
+    """ Return a line summarizing a run, for the end of its output. """
+    counters = metrics.counters
+    seconds = max(seconds, 1e-6)
+
+    return ('%d posts from %d searches (%d failed) in %.2fs: %.1f posts/sec, '
+            '%d pages (%.1f pages/sec), %.2f MB downloaded, %d cached' % (
+                posts, searches, failed, seconds, posts / seconds,
+                counters['pages_fetched'],
+                counters['pages_fetched'] / seconds,
+                counters['bytes_downloaded'] / 2.0 ** 20,
+                counters['cache_hits']))
+
+
+def get_option_parser():
+    parser = optparse.OptionParser(usage=USAGE, prog='craigslist')
+    parser.add_option('-w', '--workers', type='int', default=8,
+                      help='searches to run at once [default: %default]')
+    parser.add_option('-o', '--output', default='-', metavar='PATH',
+                      help="file to write posts to, '-' for standard output "
+                           '[default: %default]')
+    parser.add_option('-d', '--output-dir', metavar='DIR',
+                      help='write the posts of each search to its own file in '
+                           'DIR, named after its number')
+    parser.add_option('-z', '--gzip', action='store_true', default=False,
+                      help='gzip the output')
+    parser.add_option('-t', '--titles', action='store_true', default=False,
+                      help='search titles only')
+    parser.add_option('--parser', choices=sorted(parsers),
+                      help='result page parser: %s' % ', '.join(
+                          sorted(parsers)))
+    parser.add_option('--rate', type='float', metavar='N',
+                      help='at most N requests a second to each host')
+    parser.add_option('--cache', metavar='PATH',
+                      help='cache responses in the SQLite database at PATH')
+    parser.add_option('--cache-ttl', type='int', default=300, metavar='SECONDS',
+                      help='how long cached responses stay fresh '
+                           '[default: %default]')
+    parser.add_option('-q', '--quiet', action='store_true', default=False,
+                      help="don't print the summary or failed searches")
+    return parser
+
+
+def main(argv=None, client=None):
+    """
+    Run the `craigslist` command with the arguments `argv` (by default, the
+    process's), and return its exit status: 1 if any search failed. Pages
+    are fetched with `client`, or a `Client` set up by the options.
+    """
+    parser = get_option_parser()
+    options, args = parser.parse_args(argv)
+
+    if len(args) != 1:
+        parser.error('Expected one JOBFILE.')
+    if options.workers < 1:
+        parser.error('--workers must be at least 1.')
+
+    try:
+        if args[0] == '-':
+            jobs = read_jobs(sys.stdin)
+        else:
+            with open(args[0]) as lines:
+                jobs = read_jobs(lines)
+    except (IOError, ValueError), e:
+        parser.error(str(e))
+
+    if options.output_dir and not os.path.isdir(options.output_dir):
+        os.makedirs(options.output_dir)
+
+    if client is None:
+        client = Client(
+            cache=options.cache and ResponseCache(options.cache,
+                                                  options.cache_ttl),
+            scheduler=options.rate and Scheduler(options.rate))
+
+    metrics = Metrics()
+    output = Output(options.output, options.output_dir, options.gzip)
+    failed = set()
+    posts = 0
+    start = flushed = time.time()
+
+    try:
+        results = run_jobs(jobs, options.workers,
+                           SEARCH_TITLES if options.titles else SEARCH_ALL,
+                           client, options.parser, metrics)
+
+        for number, result in results:
+            location, category, query = jobs[number][:3]
+
+            if isinstance(result, Exception):
+                failed.add(number)
+                if not options.quiet:
+                    print >> sys.stderr, 'Search %d (%s %s %r) failed: %s' % (
+                        number, location, category, query, result)
+                continue
+
+            output.write(number, result, [location, category, query])
+            posts += 1
+
+            if time.time() - flushed >= FLUSH_INTERVAL:
+                output.flush()
+                flushed = time.time()
+    finally:
+        output.close()
+
+    if not options.quiet:
+        print >> sys.stderr, get_summary(len(jobs), posts, len(failed),
+                                         time.time() - start, metrics)
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
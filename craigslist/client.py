@@ -0,0 +1,167 @@
+"""
+client: HTTP clients for fetching Craigslist pages.
+
+Copyright (c) 2012 Andrew Brookins. All Rights Reserved.
+"""
+
+import sys
+import time
+
+
+def get_network_errors():
+    """
+    Return the tuple of `requests` exceptions for connection failures and
+    timeouts. `requests` is slow to import, so it is only imported for
+    clients that use it; if nothing has imported it, nothing can raise them.
+    """
+    if 'requests.exceptions' not in sys.modules:
+        return ()
+
+    from requests.exceptions import ConnectionError, Timeout
+    return ConnectionError, Timeout
+
+
+class Client(object):
+    """
+    Fetch Craigslist pages through a pooled, keep-alive HTTP session.
+
+    `transport` is any object with a `get(url, timeout=..., headers=...)`
+    method returning a response with `status_code`, `headers` and `text`
+    attributes. By default it is a `requests` session holding up to
+    `pool_size` connections per host.
+
+    Server errors and connection failures are retried up to `retries` times,
+    sleeping `backoff` seconds before the first retry and twice as long before
+    each one after it.
+
+    If `cache` is a `ResponseCache`, responses are served from it while fresh
+    and revalidated with the server once stale.
+
+    If `scheduler` is a `Scheduler`, every request waits for its turn with
+    it, and reports back how the host responded.
+    """
+
+    def __init__(self, transport=None, pool_size=10, timeout=30, retries=3,
+                 backoff=0.5, cache=None, scheduler=None):
+        if transport is None:
+            import requests
+
+            transport = requests.session(config={
+                'keep_alive': True,
+                'pool_connections': pool_size,
+                'pool_maxsize': pool_size
+            })
+
+        self.transport = transport
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.cache = cache
+        self.scheduler = scheduler
+
+    def get(self, url):
+        """
+        Get `url` and return the response, raising `requests.HTTPError` if the
+        server still returns an error after all retries.
+        """
+        if self.cache is None:
+            return self.request(url)
+
+        cached, fresh = self.cache.get(url)
+
+        if fresh:
+            return cached
+
+        headers = {}
+        if cached is not None:
+            if 'etag' in cached.headers:
+                headers['If-None-Match'] = cached.headers['etag']
+            if 'last-modified' in cached.headers:
+                headers['If-Modified-Since'] = cached.headers['last-modified']
+
+        response = self.request(url, headers)
+
+        if response.status_code == 304 and cached is not None:
+            self.cache.revalidated(url)
+            return cached
+
+        if response.status_code == 200:
+            self.cache.put(url, response)
+
+        return response
+
+    def request(self, url, headers=None):
+        """
+        Request `url` from the transport, sending `headers` if given, and
+        retry server errors and connection failures.
+        """
+        kwargs = {'timeout': self.timeout}
+        if headers:
+            kwargs['headers'] = headers
+
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+
+            if self.scheduler is not None:
+                self.scheduler.acquire(url)
+
+            try:
+                response = self.transport.get(url, **kwargs)
+            except get_network_errors():
+                if self.scheduler is not None:
+                    self.scheduler.done(url)
+                if attempt == self.retries:
+                    raise
+                continue
+
+            if self.scheduler is not None:
+                self.scheduler.done(url, response.status_code)
+
+            if response.status_code < 500:
+                return response
+
+        response.raise_for_status()
+
+    def fetch(self, url):
+        """ Fetch `url` and return the body as text. """
+        return self.get(url).text
+
+
+class StaticResponse(object):
+    """ A response served by `StaticTransport` or from a cache. """
+
+    from_cache = False
+
+    def __init__(self, url, status_code, text, headers=None):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            import requests
+
+            raise requests.HTTPError('%s Error' % self.status_code)
+
+
+class StaticTransport(object):
+    """
+    A transport serving pages from `pages`, a dict mapping URLs to HTML, in
+    place of the network. URLs missing from `pages` get an empty 404 response.
+
+    Every requested URL is recorded in `requested`, in order.
+    """
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.requested = []
+
+    def get(self, url, **kwargs):
+        self.requested.append(url)
+
+        if url in self.pages:
+            return StaticResponse(url, 200, self.pages[url])
+
+        return StaticResponse(url, 404, u'')
@@ -0,0 +1,165 @@
+"""
+columns: Columnar storage of extracted Craigslist posts, for analysis.
+
+Post IDs are stored as doubles: they pass 2 ** 31, so don't fit the `array`
+type 'l' where a C long is 32 bits (Windows, 32-bit Linux), and Python 2's
+`array` has no 64-bit integer type. Doubles hold every integer up to 2 ** 53
+exactly.
+
+Copyright (c) 2012 Andrew Brookins. All Rights Reserved.
+"""
+
+import json
+import struct
+import sys
+from array import array
+
+from craigslist import get_post_id
+
+
+MAGIC = 'CLCOLS1\n'
+
+# Numeric columns, their array type codes and the value used when a post
+# doesn't have the field.
+NUMERIC = [
+    ('id', 'd', -1),
+    ('price', 'd', float('nan')),
+    ('bedrooms', 'i', -1),
+    ('sqft', 'i', -1),
+    ('image', 'b', 0)
+]
+
+# String columns, stored as codes into a list of distinct values.
+ENCODED = ['date', 'location', 'category']
+
+
+class Columns(object):
+    """
+    Typed column buffers holding the fields of many posts.
+
+    Numeric fields are kept in `array`s: `price` as float64 (NaN when
+    missing), `id` as float64 holding whole numbers, `bedrooms` and `sqft`
+    as integers (-1 when missing, `id` too) and `image` as 0 or 1. `date`, `location` and `category` are dictionary
+    encoded: their column holds indexes into `values[name]`, with -1 for
+    missing values.
+    """
+
+    def __init__(self):
+        self.columns = {}
+        self.values = {}
+        self.codes = {}
+
+        for name, typecode, missing in NUMERIC:
+            self.columns[name] = array(typecode)
+
+        for name in ENCODED:
+            self.columns[name] = array('i')
+            self.values[name] = []
+            self.codes[name] = {}
+
+    def __len__(self):
+        return len(self.columns['id'])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def encode(self, name, value):
+        """ Return the code for `value` in the column `name`. """
+        if value is None:
+            return -1
+
+        codes = self.codes[name]
+        if value not in codes:
+            codes[value] = len(self.values[name])
+            self.values[name].append(value)
+
+        return codes[value]
+
+    def append(self, post):
+        """ Add the fields of `post` as a new row. """
+        id = get_post_id(post.get('link'))
+        self.columns['id'].append(-1 if id is None else id)
+
+        for name, typecode, missing in NUMERIC[1:]:
+            value = post.get(name)
+            self.columns[name].append(missing if value is None else value)
+
+        for name in ENCODED:
+            self.columns[name].append(self.encode(name, post.get(name)))
+
+    def extend(self, posts):
+        for post in posts:
+            self.append(post)
+
+    def decode(self, name):
+        """ Return the values of the encoded column `name`, one per row. """
+        values = self.values[name]
+        return [values[code] if code >= 0 else None
+                for code in self.columns[name]]
+
+    def to_numpy(self):
+        """
+        Return a dict mapping column names to NumPy arrays, sharing memory
+        with the column buffers. Requires NumPy.
+        """
+        import numpy
+
+        return dict((name, numpy.frombuffer(column, dtype=column.typecode))
+                    for name, column in self.columns.items())
+
+    def save(self, path):
+        """
+        Write the columns to `path`: a header describing the columns followed
+        by the raw contents of each column buffer.
+        """
+        names = sorted(self.columns)
+        header = json.dumps({
+            'rows': len(self),
+            'byteorder': sys.byteorder,
+            'columns': [(name, self.columns[name].typecode,
+                         self.columns[name].itemsize) for name in names],
+            'values': self.values
+        })
+
+        with open(path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<I', len(header)))
+            f.write(header)
+            for name in names:
+                self.columns[name].tofile(f)
+
+    @classmethod
+    def load(cls, path):
+        """ Read columns written by `save` from `path`. """
+        result = cls()
+
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError('%s is not a columns file.' % path)
+
+            size, = struct.unpack('<I', f.read(4))
+            header = json.loads(f.read(size))
+
+            for name, typecode, itemsize in header['columns']:
+                column = array(str(typecode))
+                if column.itemsize != itemsize:
+                    raise ValueError(
+                        'Column %s has %d byte items; expected %d.' % (
+                            name, itemsize, column.itemsize))
+                column.fromfile(f, header['rows'])
+                if header['byteorder'] != sys.byteorder:
+                    column.byteswap()
+                result.columns[name] = column
+
+        for name, values in header['values'].items():
+            result.values[name] = values
+            result.codes[name] = dict((v, i) for i, v in enumerate(values))
+
+        return result
+
+
+def to_columns(posts):
+    """ Return a `Columns` holding the fields of each post in `posts`. """
+    columns = Columns()
+    columns.extend(posts)
+    return columns
@@ -4,193 +4,191 @@ craigslist: A module for searching Craigslist.
 Copyright (c) 2012 Andrew Brookins. All Rights Reserved.
 """
 
-import re
-import requests
-import urllib
-from BeautifulSoup import BeautifulSoup
-
-
-def get_price(text):
+import threading
+import time
+import urlparse
+
+from client import Client
+from filters import Filter, compile_filters
+from metrics import Metrics
+from parsing import (HOUSING_DETAILS, MONEY, default_parser, extract_housing,
+                     extract_item_for_sale, extract_job, extract_posts,
+                     extractors, get_content, get_coordinates, get_extractor,
+                     get_housing_details, get_item_dict, get_next_page_url,
+                     get_post_id, get_price, get_soup, parse_page, parse_rows,
+                     parse_soup, parsers)
+from records import HousingPost, JobPost, Post
+
+
+def get_page_url(url, offset):
     """
-    Try to extract a price from `text`.
-
-    # See: http://stackoverflow.com/questions/2150205/can-somebody-explain-a-money-regex-that-just-checks-if-the-value-matches-some-pa
+    Return `url`, a search results URL, pointed at the page starting at result
+    number `offset`.
     """
-    money = re.compile('|'.join([
-        # $.50, .50, $1.50, $.5, .5
-        r'\$?(\d*\.\d{1,2})$',
+    import urllib
 
-        # $500, $5, 500, 5
-        r'\$?(\d+)$',
+    scheme, netloc, path, params, query, fragment = urlparse.urlparse(url)
+    args = urlparse.parse_qsl(query, keep_blank_values=True)
+    args = [(k, v) for k, v in args if k != 's'] + [('s', str(offset))]
 
-        # $5.
-        r'\$(\d+\.?)',
-    ]))
-    matches = money.search(text)
-    price = matches and matches.group(0) or None
+    return urlparse.urlunparse((scheme, netloc, path, params,
+                                urllib.urlencode(args), fragment))
 
-    if price:
-        return float(price[1:])
 
+def get_page_offset(url):
+    """ Return the result offset `s` of search results URL `url`, or None. """
+    query = urlparse.parse_qs(urlparse.urlparse(url).query)
 
-def get_item_dict(item):
-    """
-    Get generic Craigslist values for an item.
-
-    Many features of an item, like the date, use the same span classes across
-    categories of the site.
-    """
-    date = item.find('span', 'itemdate')
-    link = item.find('a')
-    pix = item.find('span', 'p')
-
-    result = {
-        'date': date.text.strip(),
-        'link': link.get('href'),
-        'desc': link.text.strip(),
-        'location': item.find('span', 'itempn').text.strip(),
-        'image': True if pix and pix.text else False
-    }
+    try:
+        return int(query['s'][0])
+    except (KeyError, IndexError, ValueError):
+        return
 
-    cat = item.find('span', 'itemcg')
-    if cat:
-        result['category'] = cat.text
 
-    return result
+default_client = None
 
 
-def extract_item_for_sale(item, filters=None):
-    """ Extract a Craigslist item for sale. """
-    result = get_item_dict(item)
-    price = item.find('span', 'itempp')
-    price = get_price(price.text) if price else None
+def get_default_client():
+    """ Return the `Client` used when no client is passed in. """
+    global default_client
 
-    if price:
-        result['price'] = price
+    if default_client is None:
+        default_client = Client()
 
-    return result
+    return default_client
 
 
-def extract_job(item, filters=None):
-    """ Extra a Craigslist job posting. """
-    results = get_item_dict(item)
+def fetch(url, client=None, metrics=None):
+    """
+    Fetch `url` with `client`, or the default client, and return the body as
+    text.
+    """
+    client = client or get_default_client()
 
-    result = {
-        'date': item.contents[0].text.replace('-', '').strip(),
-        'link': item.contents[1].get('href'),
-        'desc': item.contents[1].text, 'location': item.contents[2].text,
-        'image': item.contents[3].text != '',
-        'category': item.contents[4].text
-    }
+    if metrics is None:
+        return client.fetch(url)
 
-    category = item.find('small')
+    start = time.time()
+    response = client.get(url)
+    metrics.on_fetch(url, time.time() - start, response)
 
-    if category:
-        result['category'] = category.text
+    return response.text
 
-    return result
 
+def iter_pages(category, page, filters=None, workers=None, client=None,
+               parser=None, metrics=None):
+    """
+    Yield a list of posts for each page of a search, starting with `page`, the
+    parsed first page.
 
-def extract_housing(item, filters=None):
-    """ Extract a Craigslist housing unit for sale or rental. """
-    result = get_item_dict(item)
-    details = item.find('span', 'itemph')
-    details = details.text if details else item.find('a').text
+    Each following page is fetched only once the previous page's posts have
+    been consumed. If `workers` is greater than one, pages are instead fetched
+    concurrently, `workers` pages at a time.
+    """
+    while page is not None:
+        rows, url = page
+        yield extract_posts(category, rows, filters, metrics)
 
-    price = get_price(details)
-    if price:
-        result['price'] = price
+        if not url:
+            return
 
-    # Isolate the price and details (bedrooms, square feet) from a title like:
-    # '$1425 / 3br - 1492ft - Beautiful Sherwood Home Could Be Yours, Move in March 1st'
-    if '/' in details:
-        parts = details.split('/')
-        rental_details = parts[1].split('-')
+        if workers > 1 and get_page_offset(url):
+            for items in iter_pages_concurrently(category, url, filters,
+                                                 workers, client, parser,
+                                                 metrics):
+                yield items
+            return
 
-        for detail in rental_details:
-            detail = detail.strip()
+        page = parse_page(fetch(url, client, metrics), parser, metrics)
 
-            if 'ft' in detail:
-                result['sqft'] = detail
-            elif 'br' in detail:
-                # Split the number portion of strings like '1br'
-                bedrooms = detail.lower().split('br')[0]
 
-                try:
-                    bedrooms = int(bedrooms)
-                except ValueError:
-                    bedrooms = 0
+def iter_pages_concurrently(category, url, filters, workers, client=None,
+                            parser=None, metrics=None):
+    """
+    Yield a list of posts for the page at `url` and each page after it,
+    fetching them on a pool of `workers` threads.
+
+    The page size is taken from the offset in `url`, the second page, so the
+    offsets of later pages can be computed without waiting for each "Next >>"
+    link. Pages are requested `workers` at a time and yielded in order until
+    one of them is empty or has no "Next >>" link; anything fetched past that
+    page is discarded.
+    """
+    from multiprocessing.pool import ThreadPool
 
-                result['bedrooms'] = bedrooms
+    page_size = get_page_offset(url)
+    pool = ThreadPool(workers)
 
-    # Apply any filters. TODO: Make this elegant.
-    min_price = filters.get('min_price', None)
-    max_price = filters.get('max_price', None)
-    min_rooms = filters.get('min_rooms', None)
-    max_rooms = filters.get('max_rooms', None)
-    bedrooms = result.get('bedrooms', None)
+    try:
+        offset = page_size
+        while True:
+            urls = [get_page_url(url, offset + page_size * i)
+                    for i in range(workers)]
 
-    if min_price and price and price <= min_price:
-        return
-    if max_price and price and price >= max_price:
-        return
-    if min_rooms and bedrooms and bedrooms <= min_rooms:
-        return
-    if max_rooms and bedrooms and bedrooms >= max_rooms:
-        return
+            for html in pool.map(lambda url: fetch(url, client, metrics),
+                                 urls):
+                page = parse_page(html, parser, metrics)
 
-    return result
+                if page is None:
+                    return
 
+                rows, next_url = page
+                yield extract_posts(category, rows, filters, metrics)
 
-def get_soup(text):
-    return BeautifulSoup(text, convertEntities=BeautifulSoup.HTML_ENTITIES)
+                if not next_url:
+                    return
 
+            offset += page_size * workers
+    finally:
+        pool.terminate()
 
-extractors = {
-    ('default', 'sss'): extract_item_for_sale,
-    ('jjj', 'ggg', 'bbb'): extract_job,
-    ('hhh',): extract_housing
-}
 
+def iter_posts_for_category(category, location, html, filters=None,
+                            workers=None, client=None, parser=None,
+                            metrics=None):
+    """
+    Like `get_posts_for_category`, but yield each post as soon as its page has
+    been parsed, fetching the next page only when it is needed.
+    """
+    filters = compile_filters(filters)
 
-def get_extractor(category):
-    for categories, fn in extractors.items():
-        if category in categories:
-            return fn
+    for items in iter_pages(category, parse_page(html, parser, metrics),
+                            filters, workers, client, parser, metrics):
+        for item in items:
+            yield item
 
 
-def get_posts_for_category(category, location, html, filters=None):
+def get_posts_for_category(category, location, html, filters=None,
+                           workers=None, client=None, parser=None,
+                           metrics=None):
     """
     Get Craigslist all posts for the category `category`.
 
     Extract data from each post using the registered extractor and return a
     list of dictionaries containing the extracted data.
 
-    If there are additional pages, recursively call `get_posts_for_category` to
-    find items in the next page of the search.
-    """
-    items = []
-    content = get_soup(html).findAll('blockquote')
-
-    if len(content) < 2:
-        return
+    If there are additional pages, follow the "Next >>" links to find items in
+    the following pages of the search. If `workers` is greater than one, those
+    pages are fetched concurrently, `workers` pages at a time, and their posts
+    merged back in page order.
 
-    content = content[1]
-    extractor = get_extractor(category)
+    Pages are fetched with `client`, a `Client`, or a shared default client,
+    and parsed with `parser`, the name of one of `parsers`, or the default
+    parser.
 
-    for el in content.findAll('p'):
-        # Filter out newlines and item separator spans.
-        el.contents = filter(lambda x: x != u'\n' and x.text != u'-', el.contents)
-        item = extractor(el, filters)
-        if item:
-            items.append(item)
+    `filters` is a dict of filters; see `Filter` for what it can hold. If
+    `metrics` is a `Metrics`, it records timings and counts for each page.
+    """
+    filters = compile_filters(filters)
+    page = parse_page(html, parser, metrics)
 
-    next_page_text = content.find('b', text='Next >>')
+    if page is None:
+        return
 
-    if next_page_text:
-        url = next_page_text.parent.parent.get('href')
-        items += get_posts_for_category(category, location,
-                                        requests.get(url).text, filters)
+    items = []
+    for posts in iter_pages(category, page, filters, workers, client, parser,
+                            metrics):
+        items += posts
 
     return items
 
@@ -202,14 +200,17 @@ SEARCH_ALL = 'A'
 SEARCH_TITLES = 'T'
 
 
-def search(location, category, query, search_type=SEARCH_ALL, filters=None):
+def get_search_url(location, category, query, search_type=SEARCH_ALL,
+                   filters=None):
     """
-    Search Craigslist location `location` (a Craigslist URL like
-    http://portland.craigslist.org) for posts in `category` matching `query`.
+    Return the URL of the first page of results for a search of Craigslist
+    location `location` for posts in `category` matching `query`.
 
-    `search_type` indicates whether this is an all-text search ('A') or a title
-    search ('T').
+    Where Craigslist can narrow the search the way `filters` would, the URL
+    asks it to.
     """
+    import urllib
+
     valid_search_types = [SEARCH_ALL, SEARCH_TITLES]
     query = urllib.quote(query)
 
@@ -217,10 +218,122 @@ def search(location, category, query, search_type=SEARCH_ALL, filters=None):
         raise ValueError(
             'Search type must be one of: %s.' % ', '.join(valid_search_types))
 
-    search_url = '%ssearch/%s?query=%s&srchType=%s' % (
+    url = '%ssearch/%s?query=%s&srchType=%s' % (
         location, category, query, search_type)
 
-    html = requests.get(search_url).text
-    print html
+    filters = compile_filters(filters)
+    if filters:
+        extractor = get_extractor(category)
+        args = filters.search_args(
+            prices=extractor in (extract_item_for_sale, extract_housing),
+            bedrooms=extractor is extract_housing)
+        if args:
+            url += '&' + urllib.urlencode(args)
+
+    return url
+
+
+def search(location, category, query, search_type=SEARCH_ALL, filters=None,
+           workers=None, client=None, parser=None, metrics=None):
+    """
+    Search Craigslist location `location` (a Craigslist URL like
+    http://portland.craigslist.org) for posts in `category` matching `query`.
+
+    `search_type` indicates whether this is an all-text search ('A') or a title
+    search ('T').
+
+    If `workers` is greater than one, result pages after the first are fetched
+    concurrently on that many threads.
+
+    Pages are fetched with `client`, a `Client`, or a shared default client,
+    and parsed with `parser`, the name of one of `parsers`, or the default
+    parser.
+
+    `filters` is a dict of filters; see `Filter` for what it can hold. If
+    `metrics` is a `Metrics`, it records timings and counts for each page.
+    """
+    filters = compile_filters(filters)
+    html = fetch(get_search_url(location, category, query, search_type,
+                                filters), client, metrics)
+
+    return get_posts_for_category(category, location, html, filters, workers,
+                                  client, parser, metrics)
+
+
+def iter_search(location, category, query, search_type=SEARCH_ALL,
+                filters=None, workers=None, client=None, parser=None,
+                metrics=None):
+    """
+    Like `search`, but yield each post as soon as its page has been parsed.
+
+    Result pages are fetched lazily, so a caller that stops iterating early
+    doesn't pay for the pages it never reached.
+    """
+    filters = compile_filters(filters)
+    html = fetch(get_search_url(location, category, query, search_type,
+                                filters), client, metrics)
+
+    return iter_posts_for_category(category, location, html, filters, workers,
+                                   client, parser, metrics)
+
+
+def interleave_by_host(searches):
+    """
+    Reorder `searches`, a list of (location, category, query) tuples, so that
+    searches of the same location are spread out as far as possible.
+    """
+    hosts = {}
+    order = []
+
+    for s in searches:
+        host = urlparse.urlparse(s[0]).netloc
+        if host not in hosts:
+            hosts[host] = []
+            order.append(host)
+        hosts[host].append(s)
+
+    result = []
+    while order:
+        for host in list(order):
+            result.append(hosts[host].pop(0))
+            if not hosts[host]:
+                order.remove(host)
+
+    return result
+
+
+def search_many(searches, search_type=SEARCH_ALL, filters=None, workers=20,
+                per_host=4, client=None, parser=None, metrics=None):
+    """
+    Run each search in `searches`, an iterable of (location, category, query)
+    tuples, and return a dict mapping each tuple to its list of posts.
+
+    At most `workers` searches run at once, and at most `per_host` of those
+    against the same Craigslist location. `client`, `parser` and `metrics`
+    are passed on to `search`.
+    """
+    searches = interleave_by_host(list(set(searches)))
+    filters = compile_filters(filters)
+    lock = threading.Lock()
+    limits = {}
+
+    def run(s):
+        location, category, query = s
+        host = urlparse.urlparse(location).netloc
+
+        with lock:
+            if host not in limits:
+                limits[host] = threading.BoundedSemaphore(per_host)
+
+        with limits[host]:
+            return search(location, category, query, search_type, filters,
+                          client=client, parser=parser, metrics=metrics)
+
+    from multiprocessing.pool import ThreadPool
+
+    pool = ThreadPool(max(1, min(workers, len(searches))))
 
-    return get_posts_for_category(category, location, html, filters)
+    try:
+        return dict(zip(searches, pool.map(run, searches, chunksize=1)))
+    finally:
+        pool.terminate()
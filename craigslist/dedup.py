@@ -0,0 +1,202 @@
+"""
+dedup: Find posts that are near-duplicates of each other, like the same
+listing posted to several nearby sites or reposted under a new ID.
+
+Copyright (c) 2012 Andrew Brookins. All Rights Reserved.
+"""
+
+import hashlib
+import operator
+import re
+import struct
+from array import array
+
+
+WORD = re.compile(r'\w+', re.UNICODE)
+
+# The number of hash functions in a signature.
+HASHES = 64
+
+# Hash values of features seen recently. Titles share most of their words,
+# so most lookups hit.
+feature_cache = {}
+
+FEATURE_CACHE_SIZE = 100000
+
+
+def get_hashes(feature):
+    """ Return the `HASHES` 16-bit hash values of `feature`. """
+    hashes = feature_cache.get(feature)
+
+    if hashes is None:
+        if len(feature_cache) >= FEATURE_CACHE_SIZE:
+            feature_cache.clear()
+
+        data = feature.encode('utf-8')
+        hashes = feature_cache[feature] = struct.unpack(
+            '<%dH' % HASHES, hashlib.sha512(data).digest()
+            + hashlib.sha512('\0' + data).digest())
+
+    return hashes
+
+
+def get_features(post):
+    """
+    Return the set of features of `post` that its signature is made from:
+    the words and pairs of adjacent words of its `desc`, ignoring case and
+    punctuation, and its price and location, which count double.
+    """
+    words = WORD.findall((post.get('desc') or u'').lower())
+    features = set(words)
+    features.update(u'%s %s' % pair for pair in zip(words, words[1:]))
+
+    if not features:
+        return features
+
+    for field in ('price', 'location'):
+        value = post.get(field)
+        if value is not None:
+            if isinstance(value, basestring):
+                value = u' '.join(WORD.findall(value.lower()))
+            features.add(u'%s=%s' % (field, value))
+            features.add(u'%s=%s again' % (field, value))
+
+    return features
+
+
+def signature(post):
+    """
+    Return the MinHash signature of `post`'s features, or None if its `desc`
+    has no words. The fraction of places where the signatures of two posts
+    agree estimates the overlap of their features.
+    """
+    features = get_features(post)
+
+    if not features:
+        return
+
+    return array('H', map(min, zip(*map(get_hashes, features))))
+
+
+def similarity(a, b):
+    """ Return the estimated similarity, 0 to 1, of two signatures. """
+    return sum(map(operator.eq, a, b)) / float(len(a))
+
+
+class DuplicateFilter(object):
+    """
+    Remember the signatures of posts, to recognise near-duplicates of them:
+    posts whose estimated similarity is at least `threshold`.
+
+    Signatures are split into `bands` bands of `rows` hashes each, and each
+    band is indexed, so that only posts sharing a whole band are compared.
+    With the defaults, posts 75% alike share a band almost always and posts
+    30% alike rarely do. Estimates are within about 0.05 of the true
+    similarity, so the default `threshold` leaves some room below the 0.7 or
+    so of a title with one word changed. Finding and adding a post takes
+    roughly constant time however many have been seen.
+    """
+
+    def __init__(self, threshold=0.6, bands=16, rows=4):
+        if bands * rows > HASHES:
+            raise ValueError('Signatures only have %d hashes.' % HASHES)
+
+        self.threshold = threshold
+        self.bands = [(i * rows, (i + 1) * rows) for i in range(bands)]
+        self.tables = [{} for band in self.bands]
+        self.signatures = []
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def get_keys(self, signature):
+        return [hash(tuple(signature[start:end])) for start, end in self.bands]
+
+    def matches(self, signature):
+        """
+        Return the set of numbers of the remembered signatures at least
+        `threshold` similar to `signature`.
+        """
+        if signature is None:
+            return set()
+
+        candidates = set()
+        for table, key in zip(self.tables, self.get_keys(signature)):
+            candidates.update(table.get(key, ()))
+
+        return set(number for number in candidates if similarity(
+            signature, self.signatures[number]) >= self.threshold)
+
+    def find(self, signature):
+        """
+        Return the number of the first remembered signature at least
+        `threshold` similar to `signature`, or None.
+        """
+        numbers = self.matches(signature)
+        return min(numbers) if numbers else None
+
+    def add(self, signature):
+        """ Remember `signature`, and return its number. """
+        number = len(self.signatures)
+        self.signatures.append(signature)
+
+        if signature is not None:
+            for table, key in zip(self.tables, self.get_keys(signature)):
+                table.setdefault(key, []).append(number)
+
+        return number
+
+    def is_duplicate(self, post):
+        """
+        Return whether `post` is a near-duplicate of one seen before, and
+        remember it if not.
+        """
+        value = signature(post)
+
+        if self.matches(value):
+            return True
+
+        self.add(value)
+        return False
+
+    def filter(self, posts):
+        """
+        Yield the posts in `posts` that aren't near-duplicates of posts seen
+        before, as they arrive.
+        """
+        for post in posts:
+            if not self.is_duplicate(post):
+                yield post
+
+
+def cluster_duplicates(posts, threshold=0.6):
+    """
+    Group `posts` into clusters of near-duplicates, and return a list of the
+    clusters, each a list of posts in their original order. Clusters are
+    ordered by their first post, and a post with no duplicates is a cluster
+    of its own, so `[cluster[0] for cluster in clusters]` drops duplicates.
+    """
+    posts = list(posts)
+    index = DuplicateFilter(threshold)
+    parents = range(len(posts))
+
+    def root(number):
+        while parents[number] != number:
+            parents[number] = parents[parents[number]]
+            number = parents[number]
+        return number
+
+    for number, post in enumerate(posts):
+        value = signature(post)
+
+        for other in index.matches(value):
+            a, b = root(number), root(other)
+            parents[max(a, b)] = min(a, b)
+
+        index.add(value)
+
+    clusters = {}
+    for number, post in enumerate(posts):
+        clusters.setdefault(root(number), []).append(post)
+
+    return [clusters[number] for number in sorted(clusters)]
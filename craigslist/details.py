@@ -0,0 +1,297 @@
+"""
+details: Fetch and parse the pages of individual Craigslist posts.
+
+Copyright (c) 2012 Andrew Brookins. All Rights Reserved.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from HTMLParser import HTMLParser, HTMLParseError
+
+from craigslist import get_default_client, get_post_id
+from rowparser import VOID_TAGS, decode_charref, decode_entityref
+
+
+class DetailParser(HTMLParser):
+    """
+    Collect the title, body, attributes, map coordinates, images and posting
+    date of a Craigslist post page in a single pass.
+    """
+
+    def __init__(self):
+        HTMLParser.__init__(self)
+        self.field = None
+        self.depth = 0
+        self.data = []
+        self.in_attrgroup = False
+        self.details = {
+            'title': None,
+            'body': None,
+            'attributes': [],
+            'latitude': None,
+            'longitude': None,
+            'images': [],
+            'posted': None
+        }
+
+    def start_field(self, field):
+        self.field = field
+        self.depth = 1
+        self.data = []
+
+    def end_field(self):
+        text = u''.join(self.data)
+
+        if self.field == 'body':
+            lines = (u' '.join(line.split()) for line in text.splitlines())
+            self.details['body'] = u'\n'.join(lines).strip()
+        else:
+            text = u' '.join(text.split())
+
+            if self.field == 'attributes':
+                self.details['attributes'].append(text)
+            elif self.field == 'posted':
+                if text.startswith(u'Posted:'):
+                    text = text[len(u'Posted:'):].strip()
+                self.details['posted'] = text
+            else:
+                self.details[self.field] = text
+
+        self.field = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        details = self.details
+
+        if tag == 'img' and attrs.get('src'):
+            details['images'].append(attrs['src'])
+
+        if 'data-latitude' in attrs and details['latitude'] is None:
+            try:
+                details['latitude'] = float(attrs['data-latitude'])
+                details['longitude'] = float(attrs['data-longitude'])
+            except (KeyError, TypeError, ValueError):
+                details['latitude'] = None
+
+        if self.field:
+            if tag == 'br' and self.field == 'body':
+                self.data.append(u'\n')
+            elif tag not in VOID_TAGS:
+                self.depth += 1
+            return
+
+        if tag == 'p' and attrs.get('class') == 'attrgroup':
+            self.in_attrgroup = True
+
+        if tag in VOID_TAGS:
+            return
+
+        if tag == 'h2' and details['title'] is None:
+            self.start_field('title')
+        elif attrs.get('id') in ('postingbody', 'userbody'):
+            self.start_field('body')
+        elif tag == 'span' and self.in_attrgroup:
+            self.start_field('attributes')
+        elif details['posted'] is None and (
+                tag == 'date' or attrs.get('class') == 'postinginfo'):
+            self.start_field('posted')
+
+    def handle_endtag(self, tag):
+        if self.field:
+            self.depth -= 1
+            if not self.depth:
+                self.end_field()
+        elif tag == 'p':
+            self.in_attrgroup = False
+
+    def handle_data(self, data):
+        if self.field:
+            if self.field == 'body':
+                data = data.replace(u'\n', u' ')
+            self.data.append(data)
+
+    def handle_entityref(self, name):
+        self.handle_data(decode_entityref(name))
+
+    def handle_charref(self, name):
+        self.handle_data(decode_charref(name))
+
+
+def parse_details(html):
+    """
+    Return a dict of the details on the Craigslist post page `html`: its
+    `title`, `body` text, `attributes` (like '2BR / 1Ba'), map `latitude` and
+    `longitude`, `images` URLs and `posted` date. Anything missing from the
+    page is None, or an empty list.
+    """
+    if isinstance(html, str):
+        html = html.decode('utf-8', 'replace')
+
+    parser = DetailParser()
+
+    try:
+        parser.feed(html)
+        parser.close()
+    except HTMLParseError:
+        pass
+
+    if parser.field:
+        parser.end_field()
+
+    return parser.details
+
+
+def get_hash(html):
+    """ Return the content hash of the page `html`. """
+    if isinstance(html, unicode):
+        html = html.encode('utf-8')
+
+    return hashlib.sha1(html).hexdigest()
+
+
+class DetailCache(object):
+    """
+    Cache post details in the SQLite database at `path`.
+
+    Details are stored once per distinct page, by a hash of its content, and
+    each post link points at the hash of its page. A post that has been
+    fetched isn't downloaded again until it is `max_age` seconds old (never,
+    if None), and a page that is byte-for-byte one seen before, like a repost
+    under a new link, isn't parsed or stored again.
+    """
+
+    def __init__(self, path=':memory:', max_age=None):
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS details (
+                hash TEXT PRIMARY KEY,
+                data BLOB
+            );
+            CREATE TABLE IF NOT EXISTS links (
+                link TEXT PRIMARY KEY,
+                hash TEXT,
+                fetched REAL
+            );
+        ''')
+
+    def get(self, link):
+        """
+        Return the cached details of the post at `link`, or None if it isn't
+        cached or is older than `max_age`.
+        """
+        with self.lock:
+            row = self.db.execute(
+                'SELECT details.data, links.fetched FROM links JOIN details '
+                'ON links.hash = details.hash WHERE links.link = ?',
+                (link,)).fetchone()
+
+        if row is None:
+            return
+        if self.max_age is not None and time.time() - row[1] >= self.max_age:
+            return
+
+        return json.loads(zlib.decompress(row[0]))
+
+    def get_by_hash(self, hash):
+        """ Return the details parsed from the page with content `hash`. """
+        with self.lock:
+            row = self.db.execute('SELECT data FROM details WHERE hash = ?',
+                                  (hash,)).fetchone()
+
+        if row is not None:
+            return json.loads(zlib.decompress(row[0]))
+
+    def put(self, link, hash, details):
+        """
+        Cache `details`, parsed from the page at `link` whose content hash is
+        `hash`.
+        """
+        data = buffer(zlib.compress(json.dumps(details)))
+
+        with self.lock:
+            self.db.execute('INSERT OR IGNORE INTO details VALUES (?, ?)',
+                            (hash, data))
+            self.db.execute('INSERT OR REPLACE INTO links VALUES (?, ?, ?)',
+                            (link, hash, time.time()))
+            self.db.commit()
+
+
+def get_post_key(link):
+    """
+    Return the key identifying the post at `link`: its post ID, so that the
+    same post listed under several categories or locations is fetched once,
+    or the link itself if it has none.
+    """
+    return get_post_id(link) or link
+
+
+def fetch_details(posts, workers=8, client=None, cache=None):
+    """
+    Fetch and parse the page of each post in `posts`, and return a dict
+    mapping each post link to its details (see `parse_details`), or to None
+    if its page is gone, like a deleted or expired post, or couldn't be
+    fetched.
+
+    Each post is fetched once however many times it appears, on a pool of
+    `workers` threads sharing `client`. If `cache` is a `DetailCache`, posts
+    it already has aren't downloaded again; posts without details aren't
+    cached.
+    """
+    posts = list(posts)
+    links = {}
+    for post in posts:
+        link = post.get('link')
+        if link:
+            links.setdefault(get_post_key(link), link)
+
+    def get(link):
+        if cache is not None:
+            details = cache.get(link)
+            if details is not None:
+                return details
+
+        # A page that can't be fetched, after the client's retries, has no
+        # details rather than losing the details of every other post.
+        try:
+            response = (client or get_default_client()).get(link)
+        except Exception:
+            return
+
+        if response.status_code != 200:
+            return
+
+        html = response.text
+
+        if cache is None:
+            return parse_details(html)
+
+        hash = get_hash(html)
+        details = cache.get_by_hash(hash)
+        if details is None:
+            details = parse_details(html)
+        cache.put(link, hash, details)
+
+        return details
+
+    if not links:
+        return {}
+
+    from multiprocessing.pool import ThreadPool
+
+    keys = links.keys()
+    pool = ThreadPool(min(workers, len(keys)))
+
+    try:
+        details = dict(zip(keys, pool.map(
+            get, [links[key] for key in keys], chunksize=1)))
+    finally:
+        pool.terminate()
+
+    return dict((post['link'], details[get_post_key(post['link'])])
+                for post in posts if post.get('link'))
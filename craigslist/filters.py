@@ -0,0 +1,203 @@
+"""
+filters: Compile search filters into predicates over posts.
+
+Copyright (c) 2012 Andrew Brookins. All Rights Reserved.
+"""
+
+import datetime
+import math
+import re
+import time
+
+
+# Numeric filters and the post field each one bounds.
+RANGES = {
+    'min_price': 'price',
+    'max_price': 'price',
+    'min_rooms': 'bedrooms',
+    'max_rooms': 'bedrooms',
+    'min_sqft': 'sqft',
+    'max_sqft': 'sqft'
+}
+
+TEXT_FIELDS = ('desc', 'location', 'category')
+
+KEYS = (set(RANGES) | set(TEXT_FIELDS) | set('%s_re' % f for f in TEXT_FIELDS)
+        | set(['image', 'since', 'until']))
+
+
+def get_month_day(value):
+    """
+    Return the (month, day) of `value`, a date or a Craigslist date string
+    like 'Jun  7'.
+    """
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.month, value.day
+
+    parsed = time.strptime(' '.join(value.split()), '%b %d')
+    return parsed.tm_mon, parsed.tm_mday
+
+
+def range_test(key, field, bound):
+    """
+    Return a test for the filter `key` on `field`. Bounds are exclusive, and
+    posts without the field pass.
+    """
+    if key.startswith('min_'):
+        return lambda post: post.get(field) is None or post[field] > bound
+    return lambda post: post.get(field) is None or post[field] < bound
+
+
+def date_test(since, until):
+    since = since and get_month_day(since)
+    until = until and get_month_day(until)
+
+    def test(post):
+        date = post.get('date')
+        if not date:
+            return True
+        try:
+            date = get_month_day(date)
+        except ValueError:
+            return True
+        return (not since or date >= since) and (not until or date <= until)
+
+    return test
+
+
+class Filter(object):
+    """
+    A search filter compiled from `spec`, a dict which may contain:
+
+    - `min_price`, `max_price`, `min_rooms`, `max_rooms`, `min_sqft` and
+      `max_sqft`: exclusive bounds on a post's price, bedrooms and square
+      feet. Posts that don't state the value pass.
+    - `desc`, `location` and `category`: text the field must contain,
+      ignoring case.
+    - `desc_re`, `location_re` and `category_re`: regular expressions the
+      field must match.
+    - `image`: whether the post must (True) or must not (False) have a
+      picture.
+    - `since` and `until`: the first and last post dates to accept, as dates
+      or strings like 'Jun 7'. Craigslist dates have no year, so the window
+      shouldn't span New Year.
+
+    Every test runs on the extracted post, cheapest first. Tests on the
+    title also run against each result row before its post is extracted, so
+    that rows which can't pass are skipped cheaply.
+    """
+
+    def __init__(self, spec):
+        unknown = set(spec) - KEYS
+        if unknown:
+            raise ValueError('Unknown filters: %s.' % ', '.join(sorted(unknown)))
+
+        self.spec = dict(spec)
+        self.row_tests = []
+        self.post_tests = []
+        self.compile()
+
+    def compile(self):
+        spec = self.spec
+        row_tests = []
+        flag_tests = []
+        range_tests = []
+        text_tests = []
+        regex_tests = []
+        date_tests = []
+
+        if spec.get('image') is not None:
+            image = bool(spec['image'])
+            flag_tests.append(lambda post: bool(post.get('image')) == image)
+
+        for key, field in sorted(RANGES.items()):
+            if spec.get(key) is not None:
+                range_tests.append(range_test(key, field, spec[key]))
+
+        if spec.get('desc'):
+            desc = spec['desc'].lower()
+            row_tests.append(
+                lambda row: desc in (row.find('a').text or u'').lower())
+
+        if spec.get('desc_re'):
+            desc_re = re.compile(spec['desc_re'])
+            row_tests.append(
+                lambda row: desc_re.search(row.find('a').text or u''))
+
+        for field in TEXT_FIELDS:
+            if spec.get(field):
+                text_tests.append(
+                    lambda post, field=field, text=spec[field].lower():
+                        text in (post.get(field) or u'').lower())
+
+            if spec.get(field + '_re'):
+                regex_tests.append(
+                    lambda post, field=field,
+                    regex=re.compile(spec[field + '_re']):
+                        regex.search(post.get(field) or u''))
+
+        if spec.get('since') or spec.get('until'):
+            date_tests.append(date_test(spec.get('since'), spec.get('until')))
+
+        self.row_tests = row_tests
+        self.post_tests = (flag_tests + range_tests + text_tests + regex_tests
+                           + date_tests)
+
+    def accepts_row(self, row):
+        """ Return whether the result row `row` could pass the filter. """
+        for test in self.row_tests:
+            if not test(row):
+                return False
+        return True
+
+    def accepts(self, post):
+        """ Return whether the extracted post `post` passes the filter. """
+        for test in self.post_tests:
+            if not test(post):
+                return False
+        return True
+
+    __call__ = accepts
+
+    def search_args(self, prices=False, bedrooms=False):
+        """
+        Return Craigslist search URL arguments that narrow results the way
+        this filter does, so fewer pages need fetching. Pass `prices` and
+        `bedrooms` for categories whose search supports those arguments.
+
+        Craigslist's bounds are inclusive and whole numbers, so they are
+        widened to match; the filter itself still runs on every post.
+        """
+        spec = self.spec
+        args = []
+
+        if prices and spec.get('min_price') is not None:
+            args.append(('minAsk', int(math.floor(spec['min_price']))))
+        if prices and spec.get('max_price') is not None:
+            args.append(('maxAsk', int(math.ceil(spec['max_price']))))
+        if bedrooms and spec.get('min_rooms') is not None:
+            args.append(('bedrooms', int(math.floor(spec['min_rooms'])) + 1))
+        if spec.get('image'):
+            args.append(('hasPic', 1))
+
+        return args
+
+    def __getstate__(self):
+        return self.spec
+
+    def __setstate__(self, spec):
+        self.spec = spec
+        self.compile()
+
+
+def compile_filters(filters):
+    """
+    Return `filters`, a dict of filters, compiled into a `Filter`, or None if
+    there is nothing to filter on.
+    """
+    if filters is None or isinstance(filters, Filter):
+        return filters
+
+    filters = dict((k, v) for k, v in filters.items() if v is not None)
+    if filters:
+        return Filter(filters)
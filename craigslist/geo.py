@@ -0,0 +1,166 @@
+"""
+geo: A spatial index of Craigslist posts with map coordinates.
+
+Copyright (c) 2012 Andrew Brookins. All Rights Reserved.
+"""
+
+import math
+from array import array
+
+from filters import compile_filters
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def distance(lat1, lon1, lat2, lon2):
+    """ Return the great-circle distance between two points in kilometers. """
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2)
+         * math.sin((lon2 - lon1) / 2) ** 2)
+
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GeoIndex(object):
+    """
+    Index posts by the `latitude` and `longitude` of their map marker.
+
+    Coordinates are kept in float arrays, and the row numbers of posts are
+    bucketed into a grid of `cell_size` degree cells (about 2 km north to
+    south by default), so a query only looks at the posts in the cells it
+    overlaps. Posts without coordinates aren't indexed.
+
+    Queries take `filters` like `search`, applied to the posts in range:
+
+        index.within(45.52, -122.68, 2, {'min_rooms': 1, 'max_rooms': 3,
+                                          'max_price': 1500})
+    """
+
+    def __init__(self, posts=(), cell_size=0.02):
+        self.cell_size = cell_size
+        self.latitudes = array('d')
+        self.longitudes = array('d')
+        self.posts = []
+        self.grid = {}
+        self.extend(posts)
+
+    def __len__(self):
+        return len(self.posts)
+
+    def get_cell(self, latitude, longitude):
+        return (int(math.floor(latitude / self.cell_size)),
+                int(math.floor(longitude / self.cell_size)))
+
+    def add(self, post):
+        """
+        Index `post`, and return whether it had coordinates to index it by.
+        """
+        latitude = post.get('latitude')
+        longitude = post.get('longitude')
+
+        if latitude is None or longitude is None:
+            return False
+
+        cell = self.get_cell(latitude, longitude)
+        if cell not in self.grid:
+            self.grid[cell] = array('i')
+
+        self.grid[cell].append(len(self.posts))
+        self.latitudes.append(latitude)
+        self.longitudes.append(longitude)
+        self.posts.append(post)
+
+        return True
+
+    def extend(self, posts):
+        for post in posts:
+            self.add(post)
+
+    def candidates(self, south, west, north, east):
+        """
+        Return the row numbers of posts in the grid cells overlapping the box
+        from (`south`, `west`) to (`north`, `east`).
+        """
+        bottom, left = self.get_cell(south, west)
+        top, right = self.get_cell(north, east)
+
+        if (top - bottom + 1) * (right - left + 1) > len(self.grid):
+            for (y, x), rows in self.grid.iteritems():
+                if bottom <= y <= top and left <= x <= right:
+                    for row in rows:
+                        yield row
+            return
+
+        for y in xrange(bottom, top + 1):
+            for x in xrange(left, right + 1):
+                rows = self.grid.get((y, x))
+                if rows:
+                    for row in rows:
+                        yield row
+
+    def in_box(self, south, west, north, east, filters=None):
+        """
+        Return the posts inside the box from (`south`, `west`) to (`north`,
+        `east`) that pass `filters`, in the order they were added. A box with
+        `west` greater than `east` crosses the 180th meridian.
+        """
+        if west > east:
+            return (self.in_box(south, west, north, 180, filters)
+                    + self.in_box(south, -180, north, east, filters))
+
+        filters = compile_filters(filters)
+        latitudes = self.latitudes
+        longitudes = self.longitudes
+        rows = sorted(row for row in self.candidates(south, west, north, east)
+                      if south <= latitudes[row] <= north
+                      and west <= longitudes[row] <= east)
+
+        return [self.posts[row] for row in rows
+                if filters is None or filters.accepts(self.posts[row])]
+
+    def within(self, latitude, longitude, km, filters=None):
+        """
+        Return the posts within `km` kilometers of (`latitude`, `longitude`)
+        that pass `filters`, nearest first.
+        """
+        filters = compile_filters(filters)
+        span = km / KM_PER_DEGREE
+        south = max(-90.0, latitude - span)
+        north = min(90.0, latitude + span)
+        cos = math.cos(math.radians(max(abs(south), abs(north))))
+
+        if span >= 90 or cos < span / 180:
+            boxes = [(-180.0, 180.0)]
+        else:
+            west = longitude - span / cos
+            east = longitude + span / cos
+            if west < -180:
+                boxes = [(west + 360, 180.0), (-180.0, east)]
+            elif east > 180:
+                boxes = [(west, 180.0), (-180.0, east - 360)]
+            else:
+                boxes = [(west, east)]
+
+        latitudes = self.latitudes
+        longitudes = self.longitudes
+        seen = set()
+        result = []
+
+        for west, east in boxes:
+            for row in self.candidates(south, west, north, east):
+                if row in seen:
+                    continue
+                seen.add(row)
+
+                d = distance(latitude, longitude, latitudes[row],
+                             longitudes[row])
+                if d <= km:
+                    post = self.posts[row]
+                    if filters is None or filters.accepts(post):
+                        result.append((d, row, post))
+
+        result.sort()
+        return [post for d, row, post in result]
@@ -0,0 +1,115 @@
+"""
+metrics: Timings and counters for Craigslist searches.
+
+Copyright (c) 2012 Andrew Brookins. All Rights Reserved.
+"""
+
+import threading
+
+
+class Metrics(object):
+    """
+    Collect counters and timings from searches.
+
+    Pass an instance as the `metrics` argument of `search` and friends. The
+    `on_*` methods are called as pages are fetched, parsed and extracted;
+    override them to forward events elsewhere. Without a metrics object none
+    of this runs.
+
+    Counters: `pages_fetched`, `bytes_downloaded`, `cache_hits`,
+    `rows_parsed`, `posts_extracted` and `rows_filtered`. Timings, in
+    seconds: `fetch_seconds`, `parse_seconds` and `extract_seconds`, each
+    kept as a count, sum and maximum.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """ Set every counter and timing back to zero. """
+        with self.lock:
+            self.counters = dict((name, 0) for name in (
+                'pages_fetched', 'bytes_downloaded', 'cache_hits',
+                'rows_parsed', 'posts_extracted', 'rows_filtered'))
+            self.timings = dict((name, [0, 0.0, 0.0]) for name in (
+                'fetch_seconds', 'parse_seconds', 'extract_seconds'))
+
+    def incr(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def timing(self, name, seconds):
+        with self.lock:
+            timing = self.timings.setdefault(name, [0, 0.0, 0.0])
+            timing[0] += 1
+            timing[1] += seconds
+            timing[2] = max(timing[2], seconds)
+
+    def on_fetch(self, url, seconds, response):
+        """ Called after `url` was fetched in `seconds`. """
+        self.incr('pages_fetched')
+        self.timing('fetch_seconds', seconds)
+
+        if getattr(response, 'from_cache', False):
+            self.incr('cache_hits')
+        else:
+            self.incr('bytes_downloaded',
+                      len(response.text.encode('utf-8')))
+
+    def on_parse(self, seconds, rows):
+        """ Called after a page with `rows` result rows was parsed. """
+        self.incr('rows_parsed', rows)
+        self.timing('parse_seconds', seconds)
+
+    def on_extract(self, seconds, rows, posts):
+        """
+        Called after `posts` posts were extracted from `rows` result rows, the
+        rest having been filtered out.
+        """
+        self.incr('posts_extracted', posts)
+        self.incr('rows_filtered', rows - posts)
+        self.timing('extract_seconds', seconds)
+
+    def extract_seconds_per_row(self):
+        """ Return the mean time spent extracting each result row. """
+        rows = self.counters['rows_parsed']
+        return self.timings['extract_seconds'][1] / rows if rows else 0.0
+
+    def to_prometheus(self, prefix='craigslist'):
+        """ Return the metrics in the Prometheus text exposition format. """
+        lines = []
+
+        with self.lock:
+            for name, value in sorted(self.counters.items()):
+                lines.append('# TYPE %s_%s_total counter' % (prefix, name))
+                lines.append('%s_%s_total %d' % (prefix, name, value))
+
+            for name, (count, total, peak) in sorted(self.timings.items()):
+                lines.append('# TYPE %s_%s summary' % (prefix, name))
+                lines.append('%s_%s_count %d' % (prefix, name, count))
+                lines.append('%s_%s_sum %r' % (prefix, name, total))
+                lines.append('# TYPE %s_%s_max gauge' % (prefix, name))
+                lines.append('%s_%s_max %r' % (prefix, name, peak))
+
+        return '\n'.join(lines) + '\n'
+
+    def to_statsd(self, prefix='craigslist'):
+        """
+        Return the metrics as StatsD lines: counters as counts, and each
+        timing as a count plus gauges of its sum and maximum in milliseconds.
+        Call `reset` after sending them so counts aren't sent twice.
+        """
+        lines = []
+
+        with self.lock:
+            for name, value in sorted(self.counters.items()):
+                lines.append('%s.%s:%d|c' % (prefix, name, value))
+
+            for name, (count, total, peak) in sorted(self.timings.items()):
+                name = name.replace('_seconds', '_ms')
+                lines.append('%s.%s.count:%d|c' % (prefix, name, count))
+                lines.append('%s.%s.sum:%.3f|g' % (prefix, name, total * 1000))
+                lines.append('%s.%s.max:%.3f|g' % (prefix, name, peak * 1000))
+
+        return lines
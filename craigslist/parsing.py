@@ -0,0 +1,295 @@
+"""
+parsing: Parse Craigslist search pages and extract posts, without fetching
+anything.
+
+This module only needs the standard library, so short-lived programs that
+parse pages they already have can import it, or `craigslist`, without
+loading the HTTP or BeautifulSoup backends.
+
+Copyright (c) 2012 Andrew Brookins. All Rights Reserved.
+"""
+
+import re
+import time
+
+from filters import compile_filters
+from records import HousingPost, JobPost, Post
+from rowparser import parse_rows
+
+
+# See: http://stackoverflow.com/questions/2150205/can-somebody-explain-a-money-regex-that-just-checks-if-the-value-matches-some-pa
+MONEY = re.compile('|'.join([
+    # $.50, .50, $1.50, $.5, .5
+    r'\$?(\d*\.\d{1,2})$',
+
+    # $500, $5, 500, 5
+    r'\$?(\d+)$',
+
+    # $5.
+    r'\$(\d+\.?)',
+]))
+
+# The price, bedrooms and square feet at the start of a housing title like:
+# '$1425 / 3br - 1492ft - Beautiful Sherwood Home Could Be Yours, Move in March 1st'
+# Any of them may be missing, as in ' / 3br - 1200ft - ', and numbers may have
+# thousands separators, as in '$1,200'.
+NUMBER = r'\d{1,3}(?:,\d{3})+|\d+'
+
+HOUSING_DETAILS = re.compile(
+    r'\s*(?:\$(?P<price>%s)(?:\.\d*)?)?'
+    r'(?:\s*/\s*(?:(?P<bedrooms>\d+)br\b)?'
+    r'(?:\s*-?\s*(?P<sqft>%s)ft)?)?' % (NUMBER, NUMBER), re.IGNORECASE)
+
+# Titles already parsed by `get_housing_details`. Listings are seen again on
+# every poll, so most lookups hit.
+housing_details_cache = {}
+
+HOUSING_DETAILS_CACHE_SIZE = 10000
+
+
+def get_price(text):
+    """
+    Try to extract a price from `text`.
+    """
+    matches = MONEY.search(text)
+    price = matches and matches.group(0) or None
+
+    if price:
+        return float(price[1:])
+
+
+def get_housing_details(details):
+    """
+    Return the (price, bedrooms, square feet) of the housing title `details`,
+    with None for any that it doesn't give.
+    """
+    try:
+        return housing_details_cache[details]
+    except KeyError:
+        pass
+
+    price, bedrooms, sqft = HOUSING_DETAILS.match(details).group(
+        'price', 'bedrooms', 'sqft')
+
+    # Cents are dropped, as `get_price` does. A title not starting with a
+    # price may still have one elsewhere.
+    price = float(price.replace(',', '')) if price else get_price(details)
+    result = (price, bedrooms and int(bedrooms),
+              sqft and int(sqft.replace(',', '')))
+
+    if len(housing_details_cache) >= HOUSING_DETAILS_CACHE_SIZE:
+        housing_details_cache.clear()
+    housing_details_cache[details] = result
+
+    return result
+
+
+def get_post_id(link):
+    """
+    Return the numeric post ID in the Craigslist post URL `link`, like
+    3058025999 in http://portland.craigslist.org/clk/sys/3058025999.html, or
+    None if there isn't one.
+    """
+    match = re.search(r'(\d+)\.html', link or '')
+
+    if match:
+        return int(match.group(1))
+
+
+def get_item_dict(item, cls=Post):
+    """
+    Get generic Craigslist values for an item, as a `cls` record.
+
+    Many features of an item, like the date, use the same span classes across
+    categories of the site.
+    """
+    date = item.find('span', 'itemdate')
+    link = item.find('a')
+    pix = item.find('span', 'p')
+
+    result = cls(
+        date=date.text.strip(),
+        link=link.get('href'),
+        desc=link.text.strip(),
+        location=item.find('span', 'itempn').text.strip(),
+        image=True if pix and pix.text else False
+    )
+
+    cat = item.find('span', 'itemcg')
+    if cat:
+        result['category'] = cat.text
+
+    return result
+
+
+def extract_item_for_sale(item, filters=None):
+    """ Extract a Craigslist item for sale. """
+    result = get_item_dict(item)
+    price = item.find('span', 'itempp')
+    price = get_price(price.text) if price else None
+
+    if price:
+        result['price'] = price
+
+    return result
+
+
+def extract_job(item, filters=None):
+    """ Extra a Craigslist job posting. """
+    results = get_item_dict(item)
+
+    result = JobPost(
+        date=item.contents[0].text.replace('-', '').strip(),
+        link=item.contents[1].get('href'),
+        desc=item.contents[1].text, location=item.contents[2].text,
+        image=item.contents[3].text != '',
+        category=item.contents[4].text
+    )
+
+    category = item.find('small')
+
+    if category:
+        result['category'] = category.text
+
+    return result
+
+
+def get_coordinates(item):
+    """
+    Return the (latitude, longitude) of the map marker on the result row
+    `item`, or (None, None) if it doesn't have one.
+    """
+    try:
+        return (float(item.get('data-latitude')),
+                float(item.get('data-longitude')))
+    except (TypeError, ValueError):
+        return None, None
+
+
+def extract_housing(item, filters=None):
+    """ Extract a Craigslist housing unit for sale or rental. """
+    result = get_item_dict(item, HousingPost)
+    details = item.find('span', 'itemph')
+    details = details.text if details else item.find('a').text
+
+    price, bedrooms, sqft = get_housing_details(details)
+
+    if price:
+        result['price'] = price
+    if bedrooms is not None:
+        result['bedrooms'] = bedrooms
+    if sqft is not None:
+        result['sqft'] = sqft
+
+    latitude, longitude = get_coordinates(item)
+    if latitude is not None:
+        result['latitude'] = latitude
+        result['longitude'] = longitude
+
+    return result
+
+
+def get_soup(text):
+    from BeautifulSoup import BeautifulSoup
+
+    return BeautifulSoup(text, convertEntities=BeautifulSoup.HTML_ENTITIES)
+
+
+extractors = {
+    ('default', 'sss'): extract_item_for_sale,
+    ('jjj', 'ggg', 'bbb'): extract_job,
+    ('hhh',): extract_housing
+}
+
+
+def get_extractor(category):
+    for categories, fn in extractors.items():
+        if category in categories:
+            return fn
+
+
+def get_content(html):
+    """
+    Return the element holding the result rows of a Craigslist search page,
+    or None if `html` doesn't look like a search page.
+    """
+    content = get_soup(html).findAll('blockquote')
+
+    if len(content) < 2:
+        return
+
+    return content[1]
+
+
+def get_next_page_url(content):
+    """ Return the URL of the "Next >>" link in `content`, if there is one. """
+    next_page_text = content.find('b', text='Next >>')
+
+    if next_page_text:
+        return next_page_text.parent.parent.get('href')
+
+
+def parse_soup(html):
+    """
+    Return the result rows and "Next >>" link URL of the Craigslist search
+    page `html` using BeautifulSoup, or None if it doesn't look like a search
+    page.
+    """
+    content = get_content(html)
+
+    if content is None:
+        return
+
+    return content.findAll('p'), get_next_page_url(content)
+
+
+# Parsers turn a search page into its result rows and the URL of the next
+# page. 'fast' only looks at rows in a single pass; 'soup' builds a full
+# BeautifulSoup tree and copes with badly broken HTML.
+parsers = {
+    'fast': parse_rows,
+    'soup': parse_soup
+}
+
+default_parser = 'fast'
+
+
+def parse_page(html, parser=None, metrics=None):
+    """ Parse the search page `html` with `parser`, or the default parser. """
+    if metrics is None:
+        return parsers[parser or default_parser](html)
+
+    start = time.time()
+    page = parsers[parser or default_parser](html)
+    metrics.on_parse(time.time() - start, len(page[0]) if page else 0)
+
+    return page
+
+
+def extract_posts(category, rows, filters=None, metrics=None):
+    """
+    Extract data from each of the result rows `rows` using the extractor
+    registered for `category` and return a list of dictionaries.
+
+    Only posts passing `filters`, a dict of filters or a `Filter`, are
+    returned; rows that can be rejected from their title are skipped before
+    extraction.
+    """
+    items = []
+    extractor = get_extractor(category)
+    filters = compile_filters(filters)
+    start = time.time() if metrics is not None else None
+
+    for el in rows:
+        if filters and not filters.accepts_row(el):
+            continue
+        # Filter out newlines and item separator spans.
+        el.contents = filter(lambda x: x != u'\n' and x.text != u'-', el.contents)
+        item = extractor(el, filters)
+        if item and (not filters or filters.accepts(item)):
+            items.append(item)
+
+    if metrics is not None:
+        metrics.on_extract(time.time() - start, len(rows), len(items))
+
+    return items
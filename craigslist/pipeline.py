@@ -0,0 +1,128 @@
+"""
+pipeline: Run many Craigslist searches with fetching and parsing decoupled.
+
+Copyright (c) 2012 Andrew Brookins. All Rights Reserved.
+"""
+
+import threading
+
+from craigslist import (SEARCH_ALL, compile_filters, extract_posts, fetch,
+                        get_search_url, parse_page)
+
+
+def parse_worker(category, html, filters, parser):
+    """
+    Parse the search page `html` and extract its posts, in a worker process.
+
+    Return a (posts, next page URL) tuple, None if `html` isn't a search page,
+    or the exception raised while parsing, so that it can be re-raised in the
+    parent.
+    """
+    try:
+        page = parse_page(html, parser)
+
+        if page is None:
+            return
+
+        rows, next_url = page
+        return extract_posts(category, rows, filters), next_url
+    except Exception, e:
+        return e
+
+
+def search_pipeline(searches, search_type=SEARCH_ALL, filters=None,
+                    fetchers=8, processes=None, queue_size=32, client=None,
+                    parser=None):
+    """
+    Run each search in `searches`, an iterable of (location, category, query)
+    tuples, and return a dict mapping each tuple to its list of posts, like
+    `search_many`.
+
+    `fetchers` threads download pages and put them on a queue holding at most
+    `queue_size` pages; a pool of `processes` worker processes (one per core by
+    default) parses them. When parsing falls behind, the queue fills up and
+    the fetchers wait. Pages within a search are fetched one after another,
+    as each "Next >>" link is found, so work is spread across searches.
+    """
+    import multiprocessing
+    import Queue
+
+    searches = list(set(searches))
+    filters = compile_filters(filters)
+    urls = Queue.Queue()
+    pages = Queue.Queue(queue_size)
+    parsing = threading.BoundedSemaphore(queue_size)
+    lock = threading.Lock()
+    results = dict((s, {}) for s in searches)
+    remaining = [len(searches)]
+
+    def fetch_pages():
+        while True:
+            job = urls.get()
+
+            if job is None:
+                return
+
+            s, index, url = job
+            try:
+                pages.put((s, index, fetch(url, client)))
+            except Exception, e:
+                pages.put((s, index, e))
+
+    def page_done(s, index, result):
+        parsing.release()
+
+        if isinstance(result, Exception):
+            pages.put((s, index, result))
+            return
+
+        if result is not None:
+            posts, next_url = result
+            results[s][index] = posts
+
+            if next_url:
+                urls.put((s, index + 1, next_url))
+                return
+
+        with lock:
+            remaining[0] -= 1
+            if not remaining[0]:
+                pages.put(None)
+
+    for s in searches:
+        location, category, query = s
+        urls.put((s, 0, get_search_url(location, category, query,
+                                       search_type, filters)))
+
+    threads = [threading.Thread(target=fetch_pages) for i in range(fetchers)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    pool = multiprocessing.Pool(processes)
+
+    try:
+        while searches:
+            job = pages.get()
+
+            if job is None:
+                break
+
+            s, index, html = job
+
+            if isinstance(html, Exception):
+                raise html
+
+            parsing.acquire()
+            pool.apply_async(
+                parse_worker, (s[1], html, filters, parser),
+                callback=lambda result, s=s, index=index: page_done(
+                    s, index, result))
+    finally:
+        pool.terminate()
+        for thread in threads:
+            urls.put(None)
+
+    return dict((s, results[s] and [post for index in sorted(results[s])
+                                    for post in results[s][index]] or None)
+                for s in searches)
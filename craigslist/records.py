@@ -0,0 +1,109 @@
+"""
+records: Compact records for extracted Craigslist posts.
+
+Copyright (c) 2012 Andrew Brookins. All Rights Reserved.
+"""
+
+
+class Post(object):
+    """
+    A post extracted from a search results page.
+
+    Fields are stored in slots rather than a per-post dict, but a post can
+    still be used like the dicts extractors used to return: `post['price']`,
+    `'price' in post`, `post.get('price')` and `dict(post)` all work, and
+    fields that weren't found are missing rather than None.
+    """
+
+    __slots__ = ('date', 'link', 'desc', 'location', 'category', 'image',
+                 'price')
+
+    fields = __slots__
+
+    def __init__(self, **kwargs):
+        for key, value in kwargs.items():
+            self[key] = value
+
+    def __getitem__(self, key):
+        if key in self.fields:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                pass
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in self.fields:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __delitem__(self, key):
+        try:
+            delattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self.fields and hasattr(self, key)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return [key for key in self.fields if hasattr(self, key)]
+
+    def values(self):
+        return [getattr(self, key) for key in self.keys()]
+
+    def items(self):
+        return [(key, getattr(self, key)) for key in self.keys()]
+
+    def __eq__(self, other):
+        if not hasattr(other, 'items'):
+            return NotImplemented
+        return dict(self.items()) == dict(other.items())
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    __hash__ = None
+
+    def __getstate__(self):
+        return dict(self.items())
+
+    def __setstate__(self, state):
+        for key, value in state.items():
+            setattr(self, key, value)
+
+    def __repr__(self):
+        return '%s(%s)' % (self.__class__.__name__, ', '.join(
+            '%s=%r' % item for item in self.items()))
+
+
+class JobPost(Post):
+    """ A job or gig post. """
+
+    __slots__ = ()
+
+
+class HousingPost(Post):
+    """
+    A housing post, with the number of bedrooms, square feet and the
+    coordinates of its map marker.
+    """
+
+    __slots__ = ('bedrooms', 'sqft', 'latitude', 'longitude')
+
+    fields = Post.fields + __slots__
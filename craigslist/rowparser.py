@@ -0,0 +1,192 @@
+"""
+rowparser: A fast, single-pass parser for Craigslist search result pages.
+
+Copyright (c) 2012 Andrew Brookins. All Rights Reserved.
+"""
+
+import htmlentitydefs
+from HTMLParser import HTMLParser, HTMLParseError
+
+
+# Elements that never have an end tag.
+VOID_TAGS = frozenset(['br', 'img', 'hr', 'input', 'meta', 'link', 'wbr'])
+
+
+def decode_entityref(name):
+    """ Return the text of the entity reference `&name;`. """
+    if name in htmlentitydefs.name2codepoint:
+        return unichr(htmlentitydefs.name2codepoint[name])
+    return u'&%s;' % name
+
+
+def decode_charref(name):
+    """ Return the text of the character reference `&#name;`. """
+    try:
+        if name[:1] in ('x', 'X'):
+            return unichr(int(name[1:], 16))
+        return unichr(int(name))
+    except (ValueError, OverflowError):
+        return u'&#%s;' % name
+
+
+class Element(object):
+    """
+    An element inside a result row.
+
+    Supports the small part of the BeautifulSoup `Tag` API that extractors use
+    (`text`, `get`, `find` and `contents`), so the same extractors work with
+    either parser.
+    """
+
+    __slots__ = ('name', 'attrs', 'parts', 'elements', 'contents')
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.parts = []
+        self.elements = []
+        self.contents = []
+
+    @property
+    def text(self):
+        return u''.join(self.parts)
+
+    def get(self, key, default=None):
+        return self.attrs.get(key, default)
+
+    def find(self, name, attrs=None):
+        """
+        Return the first element named `name` inside this one, optionally with
+        the class `attrs`.
+        """
+        for el in self.elements:
+            if el.name == name and (attrs is None
+                                    or el.attrs.get('class') == attrs):
+                return el
+
+
+class StopParsing(Exception):
+    pass
+
+
+class RowParser(HTMLParser):
+    """
+    Collect the `<p class="row">` elements inside the second `<blockquote>`
+    of a page, and the "Next >>" link if there is one.
+
+    Only elements inside that blockquote are kept, and parsing stops as soon
+    as it is closed.
+    """
+
+    def __init__(self):
+        HTMLParser.__init__(self)
+        self.blockquotes = 0
+        self.depth = 0
+        self.stack = []
+        self.data = []
+        self.row = None
+        self.rows = []
+        self.next_url = None
+
+    def flush(self):
+        """ Add the text seen since the last tag to every open element. """
+        if not self.data:
+            return
+
+        text = u''.join(self.data)
+        self.data = []
+
+        if (text == u'Next >>' and len(self.stack) > 1
+                and self.stack[-1].name == 'b' and self.stack[-2].name == 'a'):
+            self.next_url = self.stack[-2].get('href')
+
+        text = text.strip()
+        if text:
+            for el in self.stack:
+                el.parts.append(text)
+
+    def end_row(self):
+        if self.row is not None:
+            while self.stack and self.stack.pop() is not self.row:
+                pass
+            self.row = None
+
+    def handle_starttag(self, tag, attrs):
+        self.flush()
+
+        if tag == 'blockquote':
+            self.blockquotes += 1
+            if self.blockquotes >= 2:
+                self.depth += 1
+            return
+
+        if not self.depth:
+            return
+
+        el = Element(tag, dict(attrs))
+
+        if tag == 'p':
+            self.end_row()
+            if el.attrs.get('class') == 'row':
+                self.row = el
+                self.rows.append(el)
+        elif self.row is not None:
+            self.row.elements.append(el)
+            if self.stack[-1] is self.row:
+                self.row.contents.append(el)
+
+        if tag not in VOID_TAGS:
+            self.stack.append(el)
+
+    handle_startendtag = handle_starttag
+
+    def handle_endtag(self, tag):
+        self.flush()
+
+        if not self.depth:
+            return
+
+        if tag == 'blockquote':
+            self.depth -= 1
+            if not self.depth:
+                self.end_row()
+                raise StopParsing
+        elif tag == 'p' and self.row is not None:
+            self.end_row()
+        elif any(el.name == tag for el in self.stack):
+            while self.stack.pop().name != tag:
+                pass
+
+    def handle_data(self, data):
+        if self.depth:
+            self.data.append(data)
+
+    def handle_entityref(self, name):
+        self.handle_data(decode_entityref(name))
+
+    def handle_charref(self, name):
+        self.handle_data(decode_charref(name))
+
+
+def parse_rows(html):
+    """
+    Return the result rows and "Next >>" link URL of the Craigslist search
+    page `html`, or None if it doesn't look like a search page.
+    """
+    if isinstance(html, str):
+        html = html.decode('utf-8', 'replace')
+
+    parser = RowParser()
+
+    try:
+        parser.feed(html)
+        parser.close()
+    except StopParsing:
+        pass
+    except HTMLParseError:
+        parser.flush()
+
+    if parser.blockquotes < 2:
+        return
+
+    return parser.rows, parser.next_url
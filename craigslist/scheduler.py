@@ -0,0 +1,126 @@
+"""
+scheduler: Pace requests to each Craigslist host.
+
+Copyright (c) 2012 Andrew Brookins. All Rights Reserved.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+import urlparse
+
+
+def get_priority(url):
+    """
+    Return the priority of a request for `url`: its result offset, so that
+    first pages go before deep pagination pages. Lower goes first.
+    """
+    query = urlparse.parse_qs(urlparse.urlparse(url).query)
+
+    try:
+        return int(query['s'][0])
+    except (KeyError, IndexError, ValueError):
+        return 0
+
+
+class Host(object):
+    """ The request budget and queue of waiting requests for one host. """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.time()
+        self.paused_until = 0.0
+        self.waiting = []
+
+    def wait_time(self, now):
+        """
+        Return how long until a request may be made, refilling the bucket at
+        `rate` tokens a second up to `burst`.
+        """
+        self.tokens = min(self.burst,
+                          self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class Scheduler(object):
+    """
+    Limit requests to each Craigslist host (like portland.craigslist.org) to
+    `rate` a second, with bursts of up to `burst`.
+
+    Requests waiting on the same host go in order of `priority(url)`, by
+    default their result offset, so first pages are fetched before deep
+    pagination pages.
+
+    A 403, 429 or server error from a host, or failing to reach it, multiplies
+    its rate by `slowdown` (down to `min_rate`) and pauses it for one request
+    interval. Each success raises the rate by `speedup` a second, back up to
+    `rate`.
+    """
+
+    def __init__(self, rate=1.0, burst=3, min_rate=0.05, slowdown=0.5,
+                 speedup=0.05, priority=get_priority):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.slowdown = slowdown
+        self.speedup = speedup
+        self.priority = priority
+        self.hosts = {}
+        self.counter = itertools.count()
+        self.condition = threading.Condition()
+
+    def get_host(self, url):
+        name = urlparse.urlparse(url).netloc.lower()
+
+        if name not in self.hosts:
+            self.hosts[name] = Host(self.rate, self.burst)
+
+        return self.hosts[name]
+
+    def acquire(self, url):
+        """ Block until a request for `url` may be made. """
+        with self.condition:
+            host = self.get_host(url)
+            entry = (self.priority(url), next(self.counter))
+            heapq.heappush(host.waiting, entry)
+
+            while True:
+                if host.waiting[0] is entry:
+                    wait = host.wait_time(time.time())
+
+                    if wait <= 0:
+                        host.tokens -= 1
+                        heapq.heappop(host.waiting)
+                        self.condition.notify_all()
+                        return
+
+                    self.condition.wait(wait)
+                else:
+                    self.condition.wait()
+
+    def done(self, url, status_code=None):
+        """
+        Record the outcome of a request for `url`: its status code, or None
+        if the host couldn't be reached.
+        """
+        with self.condition:
+            host = self.get_host(url)
+
+            if status_code is None or status_code in (403, 429) or (
+                    status_code >= 500):
+                host.rate = max(self.min_rate, host.rate * self.slowdown)
+                host.tokens = min(host.tokens, 0)
+                host.paused_until = time.time() + 1 / host.rate
+            else:
+                host.rate = min(self.rate, host.rate + self.speedup)
+
+            self.condition.notify_all()
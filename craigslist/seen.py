@@ -0,0 +1,88 @@
+"""
+seen: Remember which Craigslist posts have been seen, to find only new ones.
+
+Copyright (c) 2012 Andrew Brookins. All Rights Reserved.
+"""
+
+import sqlite3
+import threading
+import time
+
+from craigslist import (SEARCH_ALL, compile_filters, fetch, get_post_id,
+                        get_search_url, iter_pages, parse_page)
+
+
+class SeenIndex(object):
+    """
+    A set of post IDs stored in the SQLite database at `path`, or in memory if
+    `path` is ':memory:'.
+    """
+
+    def __init__(self, path=':memory:'):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute('CREATE TABLE IF NOT EXISTS seen '
+                        '(id INTEGER PRIMARY KEY, first_seen REAL)')
+
+    def __contains__(self, id):
+        return bool(self.seen([id]))
+
+    def __len__(self):
+        with self.lock:
+            return self.db.execute('SELECT COUNT(*) FROM seen').fetchone()[0]
+
+    def seen(self, ids):
+        """ Return the set of post IDs in `ids` that have been seen. """
+        ids = list(ids)
+        result = set()
+
+        with self.lock:
+            # Stay under SQLite's limit on query parameters.
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                result.update(id for (id,) in self.db.execute(
+                    'SELECT id FROM seen WHERE id IN (%s)' % ', '.join(
+                        '?' * len(chunk)), chunk))
+
+        return result
+
+    def add(self, ids):
+        """ Mark the post IDs in `ids` as seen. """
+        now = time.time()
+
+        with self.lock:
+            self.db.executemany('INSERT OR IGNORE INTO seen VALUES (?, ?)',
+                                ((id, now) for id in ids))
+            self.db.commit()
+
+
+def iter_new_posts(location, category, query, index, search_type=SEARCH_ALL,
+                   filters=None, client=None, parser=None):
+    """
+    Like `iter_search`, but yield only posts whose IDs aren't in `index`, a
+    `SeenIndex`, and add them to it.
+
+    Pagination stops at the first page where every post has been seen, so a
+    search that is polled often costs about one page per poll. Every post on
+    a page is marked as seen, whether or not it passes `filters`, once the
+    page's new posts have been yielded, so that a selective filter doesn't
+    stop pagination from ending.
+    """
+    filters = compile_filters(filters)
+    html = fetch(get_search_url(location, category, query, search_type,
+                                filters), client)
+
+    for posts in iter_pages(category, parse_page(html, parser), client=client,
+                            parser=parser):
+        ids = [get_post_id(post['link']) for post in posts]
+        seen = index.seen(id for id in ids if id is not None)
+
+        if ids and all(id in seen for id in ids):
+            return
+
+        for id, post in zip(ids, posts):
+            if (id is None or id not in seen) and (
+                    not filters or filters.accepts(post)):
+                yield post
+
+        index.add(id for id in ids if id is not None and id not in seen)
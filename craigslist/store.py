@@ -0,0 +1,264 @@
+"""
+store: Keep extracted Craigslist posts in a SQLite database.
+
+Copyright (c) 2012 Andrew Brookins. All Rights Reserved.
+"""
+
+import re
+import sqlite3
+import threading
+import time
+
+from craigslist import get_post_id
+from filters import RANGES, TEXT_FIELDS, Filter, get_month_day
+from records import HousingPost, JobPost, Post
+
+
+# Post fields and the columns holding them, besides `id`.
+FIELDS = ('link', 'date', 'desc', 'location', 'category', 'image', 'price',
+          'bedrooms', 'sqft', 'latitude', 'longitude')
+
+COLUMNS = ('id', 'day') + FIELDS + ('kind', 'first_seen', 'last_seen')
+
+KINDS = dict((cls.__name__, cls) for cls in (Post, JobPost, HousingPost))
+
+
+def get_day(date):
+    """
+    Return the Craigslist date string `date` as a number that sorts by date
+    within a year, like 607 for 'Jun  7', or None if it isn't a date.
+    """
+    if date is None:
+        return
+
+    try:
+        month, day = get_month_day(date)
+    except (AttributeError, TypeError, ValueError):
+        return
+
+    return month * 100 + day
+
+
+def regexp(pattern, value):
+    return value is not None and re.search(pattern, value) is not None
+
+
+def escape_like(text):
+    return re.sub(r'([\\%_])', r'\\\1', text)
+
+
+class PostStore(object):
+    """
+    Keep posts in the SQLite database at `path`, one row per post ID.
+
+    `put` adds posts and updates ones already stored, `batch_size` to a
+    transaction, and `query` selects them with the same filters `search`
+    takes. Price, date and category (with price, for slicing a category by
+    price) are indexed; the `category` filter matches part of a category, so
+    pass `category` to `query` to look one up by its index. Posts without a
+    post ID in their link aren't stored.
+    """
+
+    def __init__(self, path=':memory:', batch_size=1000):
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.create_function('regexp', 2, regexp)
+
+        if path != ':memory:':
+            self.db.execute('PRAGMA journal_mode = WAL')
+            self.db.execute('PRAGMA synchronous = NORMAL')
+
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS posts (
+                id INTEGER PRIMARY KEY,
+                day INTEGER,
+                link TEXT,
+                date TEXT,
+                desc TEXT,
+                location TEXT,
+                category TEXT,
+                image INTEGER,
+                price REAL,
+                bedrooms INTEGER,
+                sqft INTEGER,
+                latitude REAL,
+                longitude REAL,
+                kind TEXT,
+                first_seen REAL,
+                last_seen REAL
+            );
+            CREATE INDEX IF NOT EXISTS posts_price ON posts (price);
+            CREATE INDEX IF NOT EXISTS posts_category
+                ON posts (category, price);
+            CREATE INDEX IF NOT EXISTS posts_day ON posts (day);
+        ''')
+
+    def __len__(self):
+        with self.lock:
+            return self.db.execute('SELECT COUNT(*) FROM posts').fetchone()[0]
+
+    def get_row(self, post, now):
+        id = get_post_id(post.get('link'))
+
+        if id is None:
+            return
+
+        image = post.get('image')
+        return ((id, get_day(post.get('date')))
+                + tuple(post.get(field) for field in FIELDS[:5])
+                + (None if image is None else int(bool(image)),)
+                + tuple(post.get(field) for field in FIELDS[6:])
+                + (post.__class__.__name__ if isinstance(post, Post)
+                   else Post.__name__, id, now, now))
+
+    def put(self, posts):
+        """
+        Store each of `posts`, replacing stored posts with the same ID but
+        keeping when they were first seen. Return how many were stored.
+        """
+        now = time.time()
+        rows = []
+        count = 0
+
+        for post in posts:
+            row = self.get_row(post, now)
+
+            if row is not None:
+                rows.append(row)
+
+            if len(rows) >= self.batch_size:
+                count += self.write(rows)
+                rows = []
+
+        if rows:
+            count += self.write(rows)
+
+        return count
+
+    def write(self, rows):
+        with self.lock:
+            with self.db:
+                self.db.executemany(
+                    'INSERT OR REPLACE INTO posts VALUES (%s, COALESCE(('
+                    'SELECT first_seen FROM posts WHERE id = ?), ?), ?)' % (
+                        ', '.join('?' * (len(COLUMNS) - 2))), rows)
+
+        return len(rows)
+
+    def get_where(self, filters, category=None):
+        """
+        Return the SQL condition and its parameters selecting posts that pass
+        `filters`, a dict of filters or a `Filter`, with the same meaning as
+        for `search`, and are in exactly the category `category` if given.
+        """
+        terms = []
+        params = []
+
+        if category is not None:
+            terms.append('category = ?')
+            params.append(category)
+
+        if filters is None:
+            return ' AND '.join(terms) or '1', params
+
+        spec = filters.spec if isinstance(filters, Filter) else Filter(
+            filters).spec
+
+        # Posts without a field pass bounds on it. Each field's bounds go in
+        # one range, so that its index can be used.
+        bounds = [(field, '>' if key.startswith('min_') else '<', spec[key])
+                  for key, field in sorted(RANGES.items())
+                  if spec.get(key) is not None]
+
+        for key, operator in (('since', '>='), ('until', '<=')):
+            if spec.get(key):
+                month, day = get_month_day(spec[key])
+                bounds.append(('day', operator, month * 100 + day))
+
+        for field in sorted(set(field for field, operator, value in bounds)):
+            tests = [(operator, value) for name, operator, value in bounds
+                     if name == field]
+            terms.append('(%s IS NULL OR (%s))' % (field, ' AND '.join(
+                '%s %s ?' % (field, operator) for operator, value in tests)))
+            params.extend(value for operator, value in tests)
+
+        if spec.get('image') is not None:
+            terms.append('image = ?')
+            params.append(int(bool(spec['image'])))
+
+        for field in TEXT_FIELDS:
+            if spec.get(field):
+                terms.append("%s LIKE ? ESCAPE '\\'" % field)
+                params.append(u'%%%s%%' % escape_like(spec[field]))
+            if spec.get(field + '_re'):
+                terms.append('%s REGEXP ?' % field)
+                params.append(spec[field + '_re'])
+
+        return ' AND '.join(terms) or '1', params
+
+    def iter_query(self, filters=None, category=None, order_by='id',
+                   limit=None, offset=0):
+        """
+        Yield the stored posts that pass `filters` and are in exactly the
+        category `category` if given, ordered by the column `order_by`
+        (descending if it starts with '-'), skipping `offset` and stopping
+        after `limit` if given.
+        """
+        column = order_by.lstrip('-')
+        if column not in COLUMNS:
+            raise ValueError('Unknown column: %s.' % column)
+
+        where, params = self.get_where(filters, category)
+        sql = 'SELECT %s FROM posts WHERE %s ORDER BY %s %s' % (
+            ', '.join(COLUMNS), where, column,
+            'DESC' if order_by.startswith('-') else 'ASC')
+
+        if limit is not None or offset:
+            sql += ' LIMIT ? OFFSET ?'
+            params += [-1 if limit is None else limit, offset]
+
+        with self.lock:
+            cursor = self.db.execute(sql, params)
+            rows = cursor.fetchmany(self.batch_size)
+
+        while rows:
+            for row in rows:
+                yield self.get_post(row)
+
+            with self.lock:
+                rows = cursor.fetchmany(self.batch_size)
+
+    def query(self, filters=None, category=None, order_by='id', limit=None,
+              offset=0):
+        """ Return a list of the stored posts, like `iter_query`. """
+        return list(self.iter_query(filters, category, order_by, limit,
+                                    offset))
+
+    def count(self, filters=None, category=None):
+        """ Return how many stored posts `query` would return. """
+        where, params = self.get_where(filters, category)
+
+        with self.lock:
+            return self.db.execute('SELECT COUNT(*) FROM posts WHERE %s' %
+                                   where, params).fetchone()[0]
+
+    def get_post(self, row):
+        values = dict(zip(COLUMNS, row))
+        post = KINDS.get(values['kind'], Post)()
+
+        for field in FIELDS:
+            value = values[field]
+            if value is not None and field in post.fields:
+                post[field] = bool(value) if field == 'image' else value
+
+        return post
+
+    def get(self, id):
+        """ Return the stored post with the post ID `id`, or None. """
+        with self.lock:
+            row = self.db.execute('SELECT %s FROM posts WHERE id = ?' % (
+                ', '.join(COLUMNS)), (id,)).fetchone()
+
+        if row is not None:
+            return self.get_post(row)
@@ -0,0 +1,268 @@
+"""
+sweep: Run many Craigslist searches resumably, from a queue on disk.
+
+Copyright (c) 2012 Andrew Brookins. All Rights Reserved.
+"""
+
+import errno
+import os
+import sqlite3
+import threading
+import time
+
+from craigslist import (SEARCH_ALL, compile_filters, extract_posts, fetch,
+                        get_page_offset, get_post_id, get_search_url,
+                        parse_page)
+
+
+# How often, in seconds, a waiting `run` checks whether searches held by
+# other workers have finished or can be claimed.
+POLL_INTERVAL = 5.0
+
+
+def get_host_name():
+    import socket
+
+    return socket.gethostname()
+
+
+def get_worker_name():
+    """ Return a name for this process, unique across machines. """
+    return '%s:%d' % (get_host_name(), os.getpid())
+
+
+def is_dead_local_worker(worker):
+    """
+    Return whether `worker` is a default worker name (see `get_worker_name`)
+    of a process on this machine that is no longer running. Only POSIX
+    systems can tell; elsewhere, this is always False.
+    """
+    host, sep, pid = worker.rpartition(':')
+
+    if os.name != 'posix' or host != get_host_name() or not pid.isdigit():
+        return False
+
+    try:
+        os.kill(int(pid), 0)
+    except OSError, e:
+        return e.errno == errno.ESRCH
+
+    return False
+
+
+class Sweep(object):
+    """
+    A queue of searches in the SQLite database at `path`, and the progress
+    made on each of them.
+
+    `run` claims searches one at a time and yields their posts. After each
+    page, it records the page's offset, the IDs of its posts and the URL of
+    the next page, so a sweep that is stopped picks up at the page it was
+    on. Several processes, or machines sharing the file, can run the same
+    sweep; each search is claimed by one worker at a time.
+
+    A claim lasts `lease` seconds from the last page finished. A search
+    claimed by a worker that has gone away is claimed again once its lease
+    runs out, or straight away by a worker with the same name. A search held
+    by a process on the same machine that has died, under its default name,
+    is claimed again straight away too, so a process restarted after a crash
+    picks up where the last one stopped.
+    """
+
+    def __init__(self, path, lease=600):
+        self.lease = lease
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None,
+                                  check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode = WAL')
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS searches (
+                id INTEGER PRIMARY KEY,
+                location TEXT,
+                category TEXT,
+                query TEXT,
+                next_url TEXT,
+                state TEXT DEFAULT 'pending',
+                worker TEXT,
+                claimed REAL,
+                UNIQUE (location, category, query)
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                search INTEGER,
+                offset INTEGER,
+                posts INTEGER,
+                finished REAL,
+                PRIMARY KEY (search, offset)
+            );
+            CREATE TABLE IF NOT EXISTS emitted (
+                search INTEGER,
+                id INTEGER,
+                PRIMARY KEY (search, id)
+            );
+            CREATE INDEX IF NOT EXISTS searches_state ON searches (state);
+        ''')
+
+    def add(self, searches):
+        """
+        Queue each (location, category, query) tuple in `searches`, unless
+        it is already queued.
+        """
+        with self.lock:
+            self.db.execute('BEGIN')
+            self.db.executemany(
+                'INSERT OR IGNORE INTO searches (location, category, query) '
+                'VALUES (?, ?, ?)', searches)
+            self.db.execute('COMMIT')
+
+    def claim(self, worker):
+        """
+        Claim a search for `worker`, preferring one it had already claimed,
+        and return its (id, (location, category, query), next_url) or None if
+        there is nothing left to do.
+        """
+        now = time.time()
+
+        with self.lock:
+            self.db.execute('BEGIN IMMEDIATE')
+            try:
+                dead = [name for (name,) in self.db.execute(
+                    "SELECT DISTINCT worker FROM searches WHERE state = "
+                    "'running' AND worker != ?", (worker,))
+                    if is_dead_local_worker(name)]
+                row = self.db.execute(
+                    "SELECT id, location, category, query, next_url "
+                    "FROM searches WHERE state = 'running' AND (worker = ? "
+                    "OR claimed < ? OR worker IN (%s)) ORDER BY worker = ? "
+                    "DESC, id LIMIT 1" % ', '.join('?' * len(dead)),
+                    [worker, now - self.lease] + dead + [worker]).fetchone()
+
+                if row is None:
+                    row = self.db.execute(
+                        "SELECT id, location, category, query, next_url "
+                        "FROM searches WHERE state = 'pending' ORDER BY id "
+                        "LIMIT 1").fetchone()
+
+                if row is not None:
+                    self.db.execute(
+                        "UPDATE searches SET state = 'running', worker = ?, "
+                        "claimed = ? WHERE id = ?", (worker, now, row[0]))
+            finally:
+                self.db.execute('COMMIT')
+
+        if row is not None:
+            return row[0], tuple(row[1:4]), row[4]
+
+    def emitted(self, search, ids):
+        """ Return the set of post IDs in `ids` already yielded for `search`. """
+        ids = list(ids)
+        result = set()
+
+        with self.lock:
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                result.update(id for (id,) in self.db.execute(
+                    'SELECT id FROM emitted WHERE search = ? AND id IN (%s)' %
+                    ', '.join('?' * len(chunk)), [search] + chunk))
+
+        return result
+
+    def add_emitted(self, search, ids):
+        """ Record that the posts `ids` have been yielded for `search`. """
+        with self.lock:
+            self.db.execute('BEGIN')
+            self.db.executemany('INSERT OR IGNORE INTO emitted VALUES (?, ?)',
+                                ((search, id) for id in ids))
+            self.db.execute('COMMIT')
+
+    def checkpoint(self, search, worker, offset, ids, next_url):
+        """
+        Record that the page at `offset` of `search`, with the posts `ids`,
+        is done, and that the search continues at `next_url`. Return False
+        if `worker` no longer holds the search, having been too slow.
+        """
+        now = time.time()
+
+        with self.lock:
+            self.db.execute('BEGIN')
+            self.db.execute('INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)',
+                            (search, offset, len(ids), now))
+            self.db.executemany('INSERT OR IGNORE INTO emitted VALUES (?, ?)',
+                                ((search, id) for id in ids))
+            held = self.db.execute(
+                "UPDATE searches SET next_url = ?, state = ?, claimed = ? "
+                "WHERE id = ? AND worker = ?",
+                (next_url, 'running' if next_url else 'done', now, search,
+                 worker)).rowcount
+            self.db.execute('COMMIT')
+
+        return bool(held)
+
+    def progress(self):
+        """ Return a dict mapping each state to the number of searches in it. """
+        with self.lock:
+            return dict(self.db.execute(
+                'SELECT state, COUNT(*) FROM searches GROUP BY state'))
+
+    def run(self, worker=None, search_type=SEARCH_ALL, filters=None,
+            client=None, parser=None, metrics=None, wait=False):
+        """
+        Claim searches as `worker` (by default, named after this host and
+        process) until there are none left, and yield a (search, post) tuple
+        for each post found, where `search` is a (location, category, query)
+        tuple.
+
+        Searches still held by other workers are left to them. With `wait`,
+        `run` doesn't return until they are done too, claiming any whose
+        worker goes away; otherwise, check `progress` for searches still
+        'running' after it returns.
+
+        A page is checkpointed once all of its posts have been yielded. If
+        the sweep is stopped part way through a page by closing the
+        generator, or letting it be garbage collected, the posts yielded so
+        far are recorded; on resuming, that page is fetched again and only its
+        other posts are yielded. If the process dies without closing the
+        generator, nothing on the page it was on is recorded, so those posts
+        are delivered at least once, and may be yielded again.
+        """
+        worker = worker or get_worker_name()
+        filters = compile_filters(filters)
+
+        while True:
+            job = self.claim(worker)
+
+            if job is None:
+                if not wait or not self.progress().get('running'):
+                    return
+                time.sleep(POLL_INTERVAL)
+                continue
+
+            id, search, url = job
+            location, category, query = search
+            url = url or get_search_url(location, category, query,
+                                        search_type, filters)
+
+            while url:
+                page = parse_page(fetch(url, client, metrics), parser,
+                                  metrics)
+                rows, next_url = page or ([], None)
+                posts = extract_posts(category, rows, filters, metrics)
+                ids = [get_post_id(post['link']) for post in posts]
+                emitted = self.emitted(id, (i for i in ids if i is not None))
+
+                yielded = []
+                try:
+                    for post_id, post in zip(ids, posts):
+                        if post_id is None or post_id not in emitted:
+                            if post_id is not None:
+                                yielded.append(post_id)
+                            yield search, post
+                except GeneratorExit:
+                    self.add_emitted(id, yielded)
+                    raise
+
+                if not self.checkpoint(id, worker, get_page_offset(url) or 0,
+                                       [i for i in ids if i is not None],
+                                       next_url):
+                    break
+
+                url = next_url
@@ -0,0 +1,282 @@
+"""
+textindex: A full-text index of harvested Craigslist posts.
+
+Copyright (c) 2012 Andrew Brookins. All Rights Reserved.
+"""
+
+import re
+from array import array
+from bisect import bisect_left
+
+from filters import TEXT_FIELDS, compile_filters
+
+
+WORD = re.compile(r'\w+', re.UNICODE)
+
+QUERY_TOKEN = re.compile(r'''
+    \s*(?:
+        (?P<open>\() |
+        (?P<close>\)) |
+        (?P<not>-)?
+        (?:(?P<field>%s):)?
+        (?:"(?P<phrase>[^"]*)"? | (?P<word>[^\s()"]+))
+    )''' % '|'.join(TEXT_FIELDS), re.UNICODE | re.VERBOSE)
+
+
+def tokenize(text):
+    """ Return the lowercase words in `text`. """
+    return WORD.findall((text or u'').lower())
+
+
+def get_terms(words):
+    """
+    Return the index terms for the list `words`: each word, and each pair of
+    adjacent words, so that two-word phrases can be looked up directly.
+    """
+    return words + [u'%s %s' % pair for pair in zip(words, words[1:])]
+
+
+def intersect(ids, postings):
+    """
+    Remove the ids not in the sorted array `postings` from the set `ids`.
+    A few ids are looked up by bisection rather than reading all of a long
+    posting list.
+    """
+    if len(ids) * 16 < len(postings):
+        size = len(postings)
+        for id in list(ids):
+            i = bisect_left(postings, id)
+            if i == size or postings[i] != id:
+                ids.discard(id)
+    else:
+        ids.intersection_update(postings)
+
+
+def contains_phrase(words, phrase):
+    """ Return whether the list `words` contains the list `phrase` in order. """
+    size = len(phrase)
+    first = phrase[0]
+
+    for i, word in enumerate(words):
+        if word == first and words[i:i + size] == phrase:
+            return True
+
+    return False
+
+
+class QueryError(ValueError):
+    pass
+
+
+class TextIndex(object):
+    """
+    An inverted index over the `desc`, `location` and `category` of posts,
+    so that variations on a search can be answered locally instead of by
+    searching Craigslist again.
+
+    Queries are made of words, all of which must match:
+
+    - `a b` matches posts containing both words, and `a OR b` either word;
+      AND binds tighter than OR, and parentheses group.
+    - `"a b"` matches the words next to each other, in order.
+    - `-a` matches posts not containing the word.
+    - `location:a` or `category:"a b"` only looks in that field.
+
+    Each post is indexed once, however many searches it was found by.
+    """
+
+    def __init__(self, posts=()):
+        self.posts = []
+        self.links = {}
+        self.postings = {}
+        self.extend(posts)
+
+    def __len__(self):
+        return len(self.posts)
+
+    def add(self, post):
+        """ Index `post`, and return False if it was already indexed. """
+        link = post.get('link')
+        if link is not None:
+            if link in self.links:
+                return False
+            self.links[link] = len(self.posts)
+
+        id = len(self.posts)
+        self.posts.append(post)
+        terms = set()
+
+        for field in TEXT_FIELDS:
+            for term in get_terms(tokenize(post.get(field))):
+                terms.add(term)
+                terms.add(u'%s:%s' % (field, term))
+
+        for term in terms:
+            if term not in self.postings:
+                self.postings[term] = array('i')
+            self.postings[term].append(id)
+
+        return True
+
+    def extend(self, posts):
+        for post in posts:
+            self.add(post)
+
+    def parse(self, query):
+        """
+        Parse `query` into a tree of ('or', nodes), ('and', nodes),
+        ('not', node) and ('words', field, words) nodes.
+        """
+        tokens = []
+        pos = 0
+        query = query.strip()
+
+        while pos < len(query):
+            match = QUERY_TOKEN.match(query, pos)
+            if not match or match.end() == pos:
+                raise QueryError('Bad query: %r.' % query)
+            tokens.append(match)
+            pos = match.end()
+
+        tokens.reverse()
+        node = self.parse_or(tokens)
+
+        if tokens:
+            raise QueryError('Unbalanced parentheses in %r.' % query)
+
+        return node
+
+    def parse_or(self, tokens):
+        nodes = [self.parse_and(tokens)]
+
+        while tokens and self.is_or(tokens[-1]):
+            tokens.pop()
+            nodes.append(self.parse_and(tokens))
+
+        return nodes[0] if len(nodes) == 1 else ('or', nodes)
+
+    def parse_and(self, tokens):
+        nodes = []
+
+        while tokens and not tokens[-1].group('close') and not self.is_or(
+                tokens[-1]):
+            token = tokens.pop()
+
+            if token.group('open'):
+                node = self.parse_or(tokens)
+                if not tokens or not tokens.pop().group('close'):
+                    raise QueryError('Unbalanced parentheses.')
+            else:
+                words = tokenize(token.group('phrase') if token.group(
+                    'phrase') is not None else token.group('word'))
+                if not words:
+                    continue
+                node = ('words', token.group('field'), words)
+                if token.group('not'):
+                    node = ('not', node)
+
+            nodes.append(node)
+
+        if not nodes:
+            raise QueryError('Empty query or subquery.')
+
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+    def is_or(self, token):
+        return token.group('word') == 'OR' and not (
+            token.group('not') or token.group('field'))
+
+    def get_postings(self, field, term):
+        return self.postings.get(u'%s:%s' % (field, term) if field else term,
+                                 ())
+
+    def get_word_postings(self, node):
+        """
+        Return the posting lists of the terms a ('words', field, words) node
+        needs, shortest first.
+        """
+        field, words = node[1:]
+        terms = words if len(words) == 1 else get_terms(words)[len(words):]
+
+        return sorted((self.get_postings(field, term) for term in set(terms)),
+                      key=len)
+
+    def estimate(self, node):
+        """ Return an upper bound on the number of posts `node` matches. """
+        if node[0] == 'words':
+            return len(self.get_word_postings(node)[0])
+        if node[0] == 'and':
+            return min(self.estimate(child) for child in node[1])
+        return len(self.posts)
+
+    def evaluate(self, node, within=None):
+        """
+        Return the set of ids of the posts matching the query `node`, only
+        considering the ids in the set `within` if given.
+        """
+        kind = node[0]
+
+        if kind == 'words':
+            postings = self.get_word_postings(node)
+
+            if within is not None and len(within) < len(postings[0]):
+                ids = set(within)
+            else:
+                ids = set(postings.pop(0))
+                if within is not None:
+                    ids &= within
+
+            for other in postings:
+                if not ids:
+                    break
+                intersect(ids, other)
+
+            # Adjacent pairs pin down two-word phrases; longer ones still
+            # need checking against the text.
+            field, words = node[1:]
+            if len(words) > 2:
+                fields = [field] if field else TEXT_FIELDS
+                ids = set(id for id in ids if any(contains_phrase(
+                    tokenize(self.posts[id].get(f)), words) for f in fields))
+
+            return ids
+
+        if kind == 'not':
+            if within is None:
+                within = set(xrange(len(self.posts)))
+            return within - self.evaluate(node[1], within)
+
+        nodes = node[1]
+
+        if kind == 'or':
+            ids = set()
+            for child in nodes:
+                ids.update(self.evaluate(child, within))
+            return ids
+
+        # Narrow the candidates with the most selective terms first, and
+        # check the rest (negated terms last) only against what remains.
+        ids = within
+        for child in sorted(nodes, key=lambda child: (
+                child[0] == 'not', self.estimate(child))):
+            ids = self.evaluate(child, ids)
+            if not ids:
+                break
+
+        return ids
+
+    def search(self, query, filters=None):
+        """
+        Return the indexed posts matching `query` and passing `filters`, in
+        the order they were indexed.
+
+        `filters` is a dict of filters or a `Filter`, as for `search`.
+        """
+        filters = compile_filters(filters)
+        posts = [self.posts[id] for id in sorted(self.evaluate(
+            self.parse(query)))]
+
+        if filters is None:
+            return posts
+
+        return [post for post in posts if filters.accepts(post)]
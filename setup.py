@@ -15,6 +15,9 @@ setup(
     url='https://github.com/abrookins/craigslist',
     version='0.11',
     packages=['craigslist'],
+    entry_points={
+        'console_scripts': ['craigslist = craigslist.cli:main']
+    },
     install_requires=[
         'BeautifulSoup==3.2.0',
         'requests==0.10.1'
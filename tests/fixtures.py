@@ -164,3 +164,51 @@ housing = [
     """
 ]
 
+
+
+search_url = location + 'search/sss?query=laptop&srchType=A'
+
+row = """
+        <p class="row">
+            <span class="itemdate"> Jun 7</span>
+            <a href="http://portland.craigslist.org/clk/sys/%(id)s.html">laptop %(id)s</a>
+            <span class="itemsep"> - </span>
+            <span class="itempp"> $%(price)s</span>
+            <span class="itempn"><font size="-1"> (Kelso)</font></span>
+            <span class="itempx"></span>
+            <span class="itemcg"> <small class="gc"><a href="/sys/">computers - by owner</a></small></span><br class="c">
+        </p>
+"""
+
+next_page = """
+        <h4><a href="%s"><b>Next &gt;&gt;</b></a></h4>
+"""
+
+
+def result_page(ids, next_url=None):
+    """
+    Return a search results page with a for-sale row for each post ID in
+    `ids`, linking to `next_url` if given.
+    """
+    rows = ''.join(row % {'id': id, 'price': i + 1}
+                   for i, id in enumerate(ids))
+    if next_url:
+        rows += next_page % next_url
+    return '<blockquote></blockquote>\n<blockquote>%s</blockquote>' % rows
+
+
+def result_pages(pages, page_size=3):
+    """
+    Return a dict mapping the URLs of a chain of `pages` search result pages,
+    each holding `page_size` posts, to their HTML.
+    """
+    results = {}
+    for page in range(pages):
+        url = search_url if page == 0 else '%s&s=%d' % (
+            search_url, page * page_size)
+        next_url = None
+        if page < pages - 1:
+            next_url = '%s&s=%d' % (search_url, (page + 1) * page_size)
+        ids = range(page * page_size, (page + 1) * page_size)
+        results[url] = result_page([3000000000 + i for i in ids], next_url)
+    return results
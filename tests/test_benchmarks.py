@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import craigslist
+from benchmarks.server import PageServer
+from benchmarks.startup import HEAVY, STORAGE, TARGETS, measure
+from benchmarks.synthetic import result_chain, result_page
+
+
+class TestSynthetic(unittest.TestCase):
+    """
+    Verify that the synthetic pages benchmarks run on are parsed like real
+    ones.
+    """
+
+    def test_parser_parity(self):
+        for category in ('sss', 'hhh', 'jjj'):
+            html = result_page(category, range(50), 'http://x.org/', seed=1)
+            fast = craigslist.get_posts_for_category(category, '', html,
+                                                     parser='fast')
+            soup = craigslist.get_posts_for_category(category, '', html,
+                                                     parser='soup')
+
+            self.assertEqual(len(fast), 50)
+            self.assertEqual(fast, soup)
+
+    def test_search_over_http(self):
+        """
+        Verify that `craigslist.search` can page through a chain served by
+        `PageServer` with a real HTTP client.
+        """
+        with PageServer() as server:
+            server.pages.update(result_chain(server.location, 'hhh', 'house',
+                                             3, 20))
+            posts = craigslist.search(server.location, 'hhh', 'house',
+                                      client=craigslist.Client())
+
+            self.assertEqual(server.requests, 3)
+
+        self.assertEqual(len(posts), 60)
+        self.assertEqual(len(set(post['link'] for post in posts)), 60)
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_no_heavy_imports(self):
+        """
+        Verify that importing the package, or its parsing-only module, in a
+        fresh interpreter doesn't load any of the modules that are slow to
+        import.
+        """
+        for target in TARGETS:
+            run = measure(target, repeat=1)
+            self.assertEqual([name for name in HEAVY
+                              if name in run['modules']], [])
+
+    def test_no_storage_imports(self):
+        """
+        Verify that importing the package, or its parsing-only module, in a
+        fresh interpreter doesn't load the storage and indexing subsystems or
+        the modules they need, and that they still load on first use.
+        """
+        for target in TARGETS:
+            run = measure(target, repeat=1)
+            self.assertEqual([name for name in STORAGE
+                              if name in run['modules']], [])
+
+        self.assertIs(craigslist.PostStore, craigslist.store.PostStore)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import craigslist
+from craigslist.cache import normalize_url
+from craigslist.client import StaticResponse
+from tests import fixtures
+
+
+class Server(object):
+    """
+    A transport serving `fixtures.for_sale[1]` with an ETag, and answering
+    304 Not Modified when asked with that ETag.
+    """
+
+    def __init__(self):
+        self.requests = []
+
+    def get(self, url, **kwargs):
+        headers = kwargs.get('headers', {})
+        self.requests.append(headers)
+
+        if headers.get('If-None-Match') == '"v1"':
+            return StaticResponse(url, 304, u'')
+
+        return StaticResponse(url, 200, fixtures.for_sale[1].decode('utf-8'),
+                              {'etag': '"v1"'})
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.cache = craigslist.ResponseCache(os.path.join(self.dir, 'cache'))
+        self.server = Server()
+        self.client = craigslist.Client(self.server, cache=self.cache)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def _search(self):
+        return craigslist.search(fixtures.location, 'sss', 'motherboard',
+                                 client=self.client)
+
+    def test_fresh_responses_are_served_from_cache(self):
+        """
+        Verify that a repeated search is served from the cache.
+        """
+        expected = self._search()
+
+        self.assertEqual(self._search(), expected)
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_stale_responses_are_revalidated(self):
+        """
+        Verify that a stale response is revalidated with its ETag and served
+        from the cache when unchanged.
+        """
+        self.cache.ttl = 0
+        expected = self._search()
+
+        self.assertEqual(self._search(), expected)
+        self.assertEqual(self.server.requests[1], {'If-None-Match': '"v1"'})
+        self.assertEqual(self.cache.revalidations, 1)
+
+    def test_cache_persists(self):
+        """
+        Verify that responses are still cached after reopening the cache.
+        """
+        self._search()
+        cache = craigslist.ResponseCache(os.path.join(self.dir, 'cache'))
+        response, fresh = cache.get(
+            craigslist.get_search_url(fixtures.location, 'sss', 'motherboard'))
+
+        self.assertTrue(fresh)
+        self.assertEqual(response.text, fixtures.for_sale[1])
+        self.assertEqual(cache.size, self.cache.size)
+
+    def test_least_recently_used_responses_are_evicted(self):
+        """
+        Verify that the cache drops the least recently used responses once it
+        is over its size limit.
+        """
+        response = StaticResponse('', 200, u'x' * 1000)
+        self.cache.put('http://a/', response)
+        size = self.cache.size
+        self.cache.max_size = size * 2
+        time.sleep(0.01)
+        self.cache.put('http://b/', response)
+        time.sleep(0.01)
+        self.cache.get('http://a/')
+        self.cache.put('http://c/', response)
+
+        self.assertEqual(self.cache.size, size * 2)
+        self.assertTrue(self.cache.get('http://a/')[0])
+        self.assertFalse(self.cache.get('http://b/')[0])
+        self.assertTrue(self.cache.get('http://c/')[0])
+
+    def test_normalize_url(self):
+        self.assertEqual(normalize_url('HTTP://Portland.craigslist.org/search/'
+                                       'sss?srchType=A&query=a+b'),
+                         'http://portland.craigslist.org/search/'
+                         'sss?query=a+b&srchType=A')
+
+
+if __name__ == '__main__':
+    unittest.main()
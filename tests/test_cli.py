@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+
+import gzip
+import json
+import os
+import shutil
+import StringIO
+import sys
+import tempfile
+import unittest
+
+import craigslist
+from craigslist import cli
+from craigslist.client import StaticTransport
+from tests import fixtures
+
+
+class BrokenTransport(object):
+
+    def get(self, url, **kwargs):
+        raise ValueError('Broken.')
+
+
+class TestCli(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.client = craigslist.Client(StaticTransport(
+            fixtures.result_pages(5)))
+        self.jobfile = os.path.join(self.dir, 'jobs.txt')
+        self.write_jobs('# Laptops, and nothing\n',
+                        '%s\tsss\tlaptop\n' % fixtures.location,
+                        '\n',
+                        json.dumps({'location': fixtures.location,
+                                    'category': 'jjj',
+                                    'query': 'nothing'}) + '\n')
+        self.stdout, self.stderr = sys.stdout, sys.stderr
+        sys.stdout, sys.stderr = StringIO.StringIO(), StringIO.StringIO()
+
+    def tearDown(self):
+        sys.stdout, sys.stderr = self.stdout, self.stderr
+        shutil.rmtree(self.dir)
+
+    def write_jobs(self, *lines):
+        with open(self.jobfile, 'w') as jobfile:
+            jobfile.writelines(lines)
+
+    def test_read_jobs(self):
+        """
+        Verify that `cli.read_jobs` reads searches from tab-separated and
+        JSON lines, with their filters compiled.
+        """
+        jobs = cli.read_jobs([
+            '# Comment\n',
+            '%s\thhh\thouse\tmax_price=1500\timage=yes\tdesc=yard\n' % (
+                fixtures.location),
+            '   \n',
+            json.dumps({'location': fixtures.location, 'category': 'sss',
+                        'query': 'laptop', 'filters': {'min_price': 10}})
+        ])
+
+        self.assertEqual([job[:3] for job in jobs], [
+            (fixtures.location, 'hhh', 'house'),
+            (fixtures.location, 'sss', 'laptop')])
+        self.assertEqual(jobs[0][3].spec, {'max_price': 1500.0,
+                                           'image': True, 'desc': u'yard'})
+        self.assertEqual(jobs[1][3].spec, {'min_price': 10.0})
+
+    def test_read_jobs_json_filters(self):
+        """
+        Verify that filters on JSON lines are converted like those on
+        tab-separated lines.
+        """
+        jobs = cli.read_jobs([json.dumps({
+            'location': fixtures.location, 'category': 'hhh', 'query': 'a',
+            'filters': {'max_price': '1500', 'image': 'false',
+                        'min_rooms': 2, 'desc': 'yard'}})])
+
+        self.assertEqual(jobs[0][3].spec, {'max_price': 1500.0,
+                                           'image': False, 'min_rooms': 2.0,
+                                           'desc': u'yard'})
+
+    def test_read_jobs_errors(self):
+        """
+        Verify that `cli.read_jobs` names the line of a bad search.
+        """
+        for line in ('%s\thhh\n' % fixtures.location,
+                     '%s\thhh\thouse\tmax_price\n' % fixtures.location,
+                     '%s\thhh\thouse\tmax_price=lots\n' % fixtures.location,
+                     '%s\thhh\thouse\tcolour=red\n' % fixtures.location,
+                     '{"category": "hhh"}\n',
+                     '[1]\n',
+                     '{"location": "x", "category": "hhh", "filters": [1]}\n',
+                     '{"location": "x", "category": "hhh", '
+                     '"filters": {"max_price": "lots"}}\n',
+                     '{"location": "x", "category": "hhh", '
+                     '"filters": {"image": "maybe"}}\n',
+                     '{"location": "x", "category": "hhh", '
+                     '"filters": {"desc": 5}}\n'):
+            with self.assertRaisesRegexp(ValueError, '^Line 2: '):
+                cli.read_jobs(['\n', line])
+
+    def test_main(self):
+        """
+        Verify that `cli.main` writes every post found to standard output as
+        a line of JSON, and a summary to standard error.
+        """
+        self.assertEqual(cli.main([self.jobfile], self.client), 0)
+
+        records = [json.loads(line)
+                   for line in sys.stdout.getvalue().splitlines()]
+
+        self.assertEqual(len(records), 15)
+        self.assertEqual(len(set(record['link'] for record in records)), 15)
+        self.assertEqual(records[0]['search'],
+                         [fixtures.location, 'sss', 'laptop'])
+        self.assertTrue(sys.stderr.getvalue().startswith(
+            '15 posts from 2 searches (0 failed)'))
+
+    def test_main_output_dir(self):
+        """
+        Verify that `cli.main` can write the posts of each search to its own
+        gzipped file.
+        """
+        directory = os.path.join(self.dir, 'out')
+
+        self.assertEqual(cli.main(['-q', '-z', '-w', '3', '-d', directory,
+                                   self.jobfile], self.client), 0)
+        self.assertEqual(os.listdir(directory), ['0.ndjson.gz'])
+
+        with gzip.open(os.path.join(directory, '0.ndjson.gz')) as output:
+            self.assertEqual(len(output.readlines()), 15)
+
+        self.assertEqual(sys.stdout.getvalue(), '')
+        self.assertEqual(sys.stderr.getvalue(), '')
+
+    def test_failed_search(self):
+        """
+        Verify that a failing search is reported, and makes `cli.main` exit
+        with status 1.
+        """
+        client = craigslist.Client(BrokenTransport())
+
+        self.assertEqual(cli.main([self.jobfile], client), 1)
+        self.assertEqual(sys.stdout.getvalue(), '')
+        self.assertIn('failed: Broken.', sys.stderr.getvalue())
+        self.assertIn('0 posts from 2 searches (2 failed)',
+                      sys.stderr.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
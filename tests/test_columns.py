@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+import math
+import os
+import shutil
+import tempfile
+import unittest
+
+import craigslist
+from tests import fixtures
+
+
+class TestColumns(unittest.TestCase):
+
+    def setUp(self):
+        self.posts = []
+        for html in fixtures.housing:
+            self.posts += craigslist.get_posts_for_category(
+                'hhh', fixtures.location, html)
+        self.columns = craigslist.to_columns(self.posts)
+
+    def test_columns(self):
+        columns = self.columns
+
+        self.assertEqual(len(columns), 5)
+        self.assertEqual(list(columns['id'])[:2], [3064470120, 3064412526])
+        self.assertEqual(list(columns['price']),
+                         [80.0, 800.0, 295000.0, 2300.0, 600.0])
+        self.assertEqual(list(columns['bedrooms']), [-1, 1, 4, 3, -1])
+        self.assertEqual(list(columns['sqft']), [-1, -1, 2594, -1, 200])
+        self.assertEqual(list(columns['image']), [1, 0, 1, 1, 1])
+        self.assertEqual(columns.decode('category'),
+                         [post['category'] for post in self.posts])
+        self.assertEqual(columns.values['category'],
+                         ['vacation rentals', 'apts/housing for rent',
+                          'real estate - by broker', 'rooms & shares'])
+
+    def test_missing_price(self):
+        post = craigslist.get_posts_for_category('sss', fixtures.location,
+                                                 fixtures.for_sale[0])[0]
+        columns = craigslist.to_columns([post])
+
+        self.assertTrue(math.isnan(columns['price'][0]))
+
+    def test_large_post_ids(self):
+        """
+        Verify that post IDs past 2 ** 32 are stored exactly, whatever the
+        size of a C long.
+        """
+        columns = craigslist.to_columns([craigslist.Post(
+            link='http://portland.craigslist.org/mlt/sys/9000000001.html')])
+
+        self.assertEqual(columns['id'].typecode, 'd')
+        self.assertEqual(int(columns['id'][0]), 9000000001)
+
+    def test_save_and_load(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'posts.cols')
+            self.columns.save(path)
+            columns = craigslist.Columns.load(path)
+        finally:
+            shutil.rmtree(directory)
+
+        for name in self.columns.columns:
+            self.assertEqual(columns[name], self.columns[name])
+        self.assertEqual(columns.decode('location'),
+                         self.columns.decode('location'))
+
+    def test_to_numpy(self):
+        try:
+            import numpy
+        except ImportError:
+            return
+
+        arrays = self.columns.to_numpy()
+
+        self.assertEqual(arrays['price'].dtype, numpy.float64)
+        self.assertEqual(arrays['sqft'].sum(), 2594 + 200 - 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
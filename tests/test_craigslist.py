@@ -1,8 +1,13 @@
 # -*- coding: utf-8 -*-
 
+import threading
+import time
 import unittest
 
+import requests
+
 import craigslist
+from craigslist.client import StaticResponse, StaticTransport
 from tests import fixtures
 
 
@@ -38,6 +43,28 @@ class TestCraigslist(unittest.TestCase):
         self._test_price_formatting(2000)
         self._test_price_formatting(100000)
 
+    def test_get_housing_details(self):
+        """
+        Test that `get_housing_details` finds the price, bedrooms and square
+        feet in housing titles.
+        """
+        details = craigslist.get_housing_details
+
+        self.assertEqual(details(u'$1425 / 3br - 1492ft\xb2 - Sherwood Home'),
+                         (1425.0, 3, 1492))
+        self.assertEqual(details('$800 / 1br - Great apartment'),
+                         (800.0, 1, None))
+        self.assertEqual(details('$600 / 200ft - '), (600.0, None, 200))
+        self.assertEqual(details("$80 Stay at 'inner northeast charmer'"),
+                         (80.0, None, None))
+        self.assertEqual(details('$1425.50 / 2BR - '), (1425.0, 2, None))
+        self.assertEqual(details('Modern Furnished Home'), (None, None, None))
+        self.assertEqual(details(u' / 3br - 1200ft\xb2 - Nice'),
+                         (None, 3, 1200))
+        self.assertEqual(details(u'$1,200 / 2br - nice'), (1200.0, 2, None))
+        self.assertEqual(details(u'$1,425.50 / 1,100ft - '),
+                         (1425.0, None, 1100))
+
     def test_extract_item_for_sale_no_price(self):
         """
         Verify that `craigslist.extract_item_for_sale` works with a mock
@@ -145,6 +172,8 @@ class TestCraigslist(unittest.TestCase):
                          u"$295000 / 4br - 2594ft\xb2 - Beautiful 4 "
                          "Bedroom With Hardwoods")
         self.assertEqual(result[0]['category'], 'real estate - by broker')
+        self.assertEqual(result[0]['bedrooms'], 4)
+        self.assertEqual(result[0]['sqft'], 2594)
 
     def test_extract_housing_with_rooms_and_coords(self):
         """
@@ -163,6 +192,19 @@ class TestCraigslist(unittest.TestCase):
         self.assertEqual(result[0]['desc'],
                          u"Modern Furnished Home - Short term OK -Pets OK")
         self.assertEqual(result[0]['category'], 'apts/housing for rent')
+        self.assertFalse('latitude' in result[0])
+
+    def test_extract_housing_coordinates(self):
+        """
+        Verify that `craigslist.extract_housing` extracts the coordinates of
+        an item's map marker, with either parser.
+        """
+        for parser in ('fast', 'soup'):
+            result = craigslist.get_posts_for_category(
+                'hhh', fixtures.location, fixtures.housing[4], parser=parser)
+
+            self.assertEqual(result[0]['latitude'], 45.5682501767752)
+            self.assertEqual(result[0]['longitude'], -122.63279249111)
 
     def test_bad_category_value(self):
         """
@@ -173,5 +215,163 @@ class TestCraigslist(unittest.TestCase):
         self.assertEqual(result[0]['category'], '<<computers - by owner')
 
 
+class TestPagination(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = StaticTransport(fixtures.result_pages(5))
+        self.fetched = self.transport.requested
+        self.client = craigslist.Client(self.transport)
+
+    def _search(self, workers=None):
+        return craigslist.search(fixtures.location, 'sss', 'laptop',
+                                 workers=workers, client=self.client)
+
+    def test_follows_next_page_links(self):
+        """
+        Verify that `craigslist.search` collects posts from every page.
+        """
+        result = self._search()
+
+        self.assertEqual(len(result), 15)
+        self.assertEqual(len(self.fetched), 5)
+        self.assertTrue(result[-1]['link'].endswith('3000000014.html'))
+
+    def test_concurrent_pages_are_merged_in_order(self):
+        """
+        Verify that fetching pages concurrently returns the same posts, in the
+        same order, as fetching them one by one.
+        """
+        expected = self._search()
+
+        for workers in (2, 3, 4, 8):
+            self.assertEqual(self._search(workers=workers), expected)
+
+    def test_concurrent_pages_stop_at_last_page(self):
+        """
+        Verify that pages fetched past the last page are discarded.
+        """
+        result = self._search(workers=8)
+
+        self.assertEqual(len(result), 15)
+        self.assertTrue('%s&s=24' % fixtures.search_url in self.fetched)
+        self.assertFalse('%s&s=27' % fixtures.search_url in self.fetched)
+
+    def test_iter_search_fetches_pages_lazily(self):
+        """
+        Verify that `craigslist.iter_search` yields the same posts as
+        `craigslist.search`, fetching each page only when it is reached.
+        """
+        posts = craigslist.iter_search(fixtures.location, 'sss', 'laptop',
+                                       client=self.client)
+
+        first = [posts.next() for i in range(4)]
+        self.assertEqual(len(self.fetched), 2)
+
+        self.assertEqual(first + list(posts), self._search())
+
+    def test_get_page_url(self):
+        """
+        Verify that `craigslist.get_page_url` replaces the result offset.
+        """
+        url = craigslist.get_page_url(fixtures.search_url + '&s=100', 300)
+
+        self.assertEqual(url, fixtures.search_url + '&s=300')
+        self.assertEqual(craigslist.get_page_offset(url), 300)
+        self.assertEqual(craigslist.get_page_offset(fixtures.search_url), None)
+
+
+class TestSearchMany(unittest.TestCase):
+
+    def setUp(self):
+        self.lock = threading.Lock()
+        self.active = {}
+        self.peak = {}
+
+    def get(self, url, **kwargs):
+        """
+        Serve a single page of results for `url`, recording how many requests
+        were in flight against its host at once.
+        """
+        host = url.split('/')[2]
+
+        with self.lock:
+            self.active[host] = self.active.get(host, 0) + 1
+            self.peak[host] = max(self.peak.get(host, 0), self.active[host])
+
+        time.sleep(0.01)
+
+        with self.lock:
+            self.active[host] -= 1
+
+        return StaticResponse(url, 200,
+                              fixtures.result_page([hash(url) % 1000]))
+
+    def test_search_many(self):
+        """
+        Verify that `craigslist.search_many` returns results keyed by search
+        and respects the per-host limit.
+        """
+        locations = ['http://portland.craigslist.org/',
+                     'http://seattle.craigslist.org/']
+        searches = [(location, category, query)
+                    for location in locations
+                    for category in ('sss', 'hhh', 'jjj')
+                    for query in ('bike', 'desk', 'lamp')]
+
+        result = craigslist.search_many(searches, workers=8, per_host=2,
+                                        client=craigslist.Client(self))
+
+        self.assertEqual(sorted(result), sorted(searches))
+        for location, category, query in searches:
+            url = craigslist.get_search_url(location, category, query)
+            self.assertEqual(result[location, category, query][0]['desc'],
+                             'laptop %d' % (hash(url) % 1000))
+        self.assertEqual(self.peak, {'portland.craigslist.org': 2,
+                                     'seattle.craigslist.org': 2})
+
+    def test_interleave_by_host(self):
+        """
+        Verify that `craigslist.interleave_by_host` alternates locations.
+        """
+        searches = [('http://a.craigslist.org/', 'sss', 'x'),
+                    ('http://a.craigslist.org/', 'sss', 'y'),
+                    ('http://a.craigslist.org/', 'sss', 'z'),
+                    ('http://b.craigslist.org/', 'sss', 'x')]
+
+        result = craigslist.interleave_by_host(searches)
+
+        self.assertEqual([s[0][7] for s in result], ['a', 'b', 'a', 'a'])
+
+
+class TestClient(unittest.TestCase):
+
+    def test_retries_server_errors(self):
+        """
+        Verify that `craigslist.Client` retries server errors and gives up
+        after its last retry.
+        """
+        responses = [StaticResponse(fixtures.search_url, 503, u''),
+                     StaticResponse(fixtures.search_url, 200, u'ok')]
+        transport = StaticTransport({})
+        transport.get = lambda url, **kwargs: responses.pop(0)
+        client = craigslist.Client(transport, retries=1, backoff=0)
+
+        self.assertEqual(client.fetch(fixtures.search_url), 'ok')
+
+        responses = [StaticResponse(fixtures.search_url, 503, u'')] * 2
+        self.assertRaises(requests.HTTPError, client.fetch,
+                          fixtures.search_url)
+
+    def test_client_errors_are_not_retried(self):
+        """
+        Verify that `craigslist.Client` returns client errors without retrying.
+        """
+        transport = StaticTransport({})
+        client = craigslist.Client(transport, retries=3, backoff=0)
+
+        self.assertEqual(client.get(fixtures.search_url).status_code, 404)
+        self.assertEqual(transport.requested, [fixtures.search_url])
+
+
 if __name__ == '__main__':
     unittest.main()
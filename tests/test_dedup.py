@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+import random
+import unittest
+
+import craigslist
+from craigslist.dedup import signature, similarity
+
+
+def post(id, desc, price=1400.0, location=u'(Alberta)', site='portland'):
+    return craigslist.HousingPost(
+        link='http://%s.craigslist.org/apa/%d.html' % (site, id), desc=desc,
+        price=price, location=location)
+
+
+posts = [
+    post(1, u'Sunny 2br house near Alberta Arts, big yard, pets OK'),
+    post(2, u'Dell laptop with charger, works great', 300.0, u'(Tigard)'),
+    # Reposted with a new ID, and cross-posted to another site.
+    post(3, u'SUNNY 2BR house near Alberta Arts - big yard!! pets ok'),
+    post(4, u'Sunny 2br house near Alberta Arts, big yard, pets OK',
+         site='vancouver'),
+    post(5, u'Sunny 3br house near Mississippi, small yard, no pets'),
+    # Edited, and repriced.
+    post(6, u'Sunny 2br house near Alberta Arts, huge yard, pets OK'),
+    post(7, u'Sunny 2br house near Alberta Arts, big yard, pets OK', 1350.0),
+    post(8, u'')
+]
+
+
+class TestDedup(unittest.TestCase):
+
+    def test_similarity(self):
+        same = signature(posts[0])
+
+        self.assertEqual(similarity(same, signature(posts[2])), 1.0)
+        self.assertTrue(similarity(same, signature(posts[5])) > 0.6)
+        self.assertTrue(similarity(same, signature(posts[6])) > 0.6)
+        self.assertTrue(similarity(same, signature(posts[4])) < 0.5)
+        self.assertTrue(similarity(same, signature(posts[1])) < 0.2)
+        self.assertEqual(signature(posts[7]), None)
+
+    def test_filter(self):
+        """
+        Verify that the streaming filter drops reposts, cross-posts and
+        lightly edited copies, keeping the first.
+        """
+        kept = list(craigslist.DuplicateFilter().filter(posts))
+
+        self.assertEqual(kept, [posts[0], posts[1], posts[4], posts[7]])
+
+    def test_cluster_duplicates(self):
+        clusters = craigslist.cluster_duplicates(posts)
+
+        self.assertEqual(clusters, [
+            [posts[0], posts[2], posts[3], posts[5], posts[6]],
+            [posts[1]], [posts[4]], [posts[7]]])
+
+    def test_unrelated_posts_are_kept(self):
+        rand = random.Random(0)
+        words = (u'great sunny quiet modern vintage large cozy new used desk '
+                 u'bike laptop apartment house room near park downtown'.split())
+        unique = [post(i, u' '.join(rand.sample(words, 6)),
+                       float(rand.randint(100, 3000))) for i in range(500)]
+
+        kept = list(craigslist.DuplicateFilter().filter(unique))
+
+        self.assertTrue(len(kept) > 490)
+
+
+if __name__ == '__main__':
+    unittest.main()
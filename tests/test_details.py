@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import craigslist
+from craigslist.client import StaticResponse, StaticTransport
+
+
+page = u'''<html><body>
+<h2 class="postingtitle">Sunny 2br near park - $1450 (Sellwood)</h2>
+<section class="userbody">
+<figure class="iw"><img src="http://images.craigslist.org/a.jpg"></figure>
+<div class="mapAndAttrs">
+<div id="map" data-latitude="45.4653" data-longitude="-122.6497"></div>
+<p class="attrgroup"><span><b>2BR</b> / <b>1Ba</b></span>
+<span><b>850</b>ft<sup>2</sup></span></p>
+</div>
+<section id="postingbody">
+Quiet unit with   a yard.<br>
+No smoking &amp; no <b>cats</b>.
+</section>
+</section>
+<p class="postinginfo">Posted: <date>2012-07-02, 10:44AM PDT</date></p>
+</body></html>'''
+
+links = ['http://portland.craigslist.org/mlt/apa/3100000000.html',
+         'http://portland.craigslist.org/mlt/apa/3100000001.html']
+
+
+class TestDetails(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = StaticTransport(dict((link, page) for link in links))
+        self.client = craigslist.Client(self.transport)
+
+    def test_parse_details(self):
+        details = craigslist.parse_details(page)
+
+        self.assertEqual(details['title'],
+                         u'Sunny 2br near park - $1450 (Sellwood)')
+        self.assertEqual(details['body'],
+                         u'Quiet unit with a yard.\nNo smoking & no cats.')
+        self.assertEqual(details['attributes'], [u'2BR / 1Ba', u'850ft2'])
+        self.assertEqual(details['latitude'], 45.4653)
+        self.assertEqual(details['longitude'], -122.6497)
+        self.assertEqual(details['images'],
+                         [u'http://images.craigslist.org/a.jpg'])
+        self.assertEqual(details['posted'], u'2012-07-02, 10:44AM PDT')
+
+    def test_parse_details_missing_fields(self):
+        details = craigslist.parse_details(u'<html><body></body></html>')
+
+        self.assertEqual(details['title'], None)
+        self.assertEqual(details['latitude'], None)
+        self.assertEqual(details['attributes'], [])
+
+    def test_cross_posts_are_fetched_once(self):
+        """
+        Verify that a post listed under two locations or categories is fetched
+        once, and that every link gets its details.
+        """
+        cross_post = 'http://seattle.craigslist.org/see/apa/3100000000.html'
+        posts = [{'link': links[0]}, {'link': cross_post},
+                 {'link': links[1]}, {'link': links[1]}]
+
+        details = craigslist.fetch_details(posts, client=self.client)
+
+        self.assertEqual(sorted(details), sorted([cross_post] + links))
+        self.assertEqual(details[cross_post], details[links[0]])
+        self.assertEqual(len(self.transport.requested), 2)
+
+    def test_cached_posts_are_not_fetched(self):
+        cache = craigslist.DetailCache()
+        posts = [{'link': link} for link in links]
+
+        first = craigslist.fetch_details(posts, client=self.client,
+                                         cache=cache)
+        del self.transport.requested[:]
+        second = craigslist.fetch_details(posts, client=self.client,
+                                          cache=cache)
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.transport.requested, [])
+
+    def test_cache_stores_identical_pages_once(self):
+        cache = craigslist.DetailCache()
+        craigslist.fetch_details([{'link': link} for link in links],
+                                 client=self.client, cache=cache)
+
+        self.assertEqual(cache.db.execute(
+            'SELECT COUNT(*) FROM details').fetchone()[0], 1)
+        self.assertEqual(cache.db.execute(
+            'SELECT COUNT(*) FROM links').fetchone()[0], 2)
+
+    def test_cache_max_age(self):
+        cache = craigslist.DetailCache(max_age=0)
+        posts = [{'link': links[0]}]
+
+        craigslist.fetch_details(posts, client=self.client, cache=cache)
+        craigslist.fetch_details(posts, client=self.client, cache=cache)
+
+        self.assertEqual(len(self.transport.requested), 2)
+
+    def test_posts_can_be_a_generator(self):
+        details = craigslist.fetch_details(
+            ({'link': link} for link in links), client=self.client)
+
+        self.assertEqual(sorted(details), links)
+
+    def test_missing_pages_are_not_cached(self):
+        """
+        Verify that a post whose page is gone, like a deleted post, has no
+        details and is fetched again next time.
+        """
+        cache = craigslist.DetailCache()
+        gone = 'http://portland.craigslist.org/mlt/apa/3100000002.html'
+        posts = [{'link': links[0]}, {'link': gone}]
+
+        details = craigslist.fetch_details(posts, client=self.client,
+                                           cache=cache)
+        del self.transport.requested[:]
+        craigslist.fetch_details(posts, client=self.client, cache=cache)
+
+        self.assertEqual(details[gone], None)
+        self.assertEqual(details[links[0]]['latitude'], 45.4653)
+        self.assertEqual(self.transport.requested, [gone])
+
+    def test_failed_fetches_are_not_cached(self):
+        """
+        Verify that a post whose page can't be fetched has no details, that
+        the other posts still get theirs, and that it is fetched again next
+        time.
+        """
+        class FailingTransport(StaticTransport):
+            def get(self, url, **kwargs):
+                if url == links[1]:
+                    self.requested.append(url)
+                    return StaticResponse(url, 503, u'')
+                return StaticTransport.get(self, url, **kwargs)
+
+        transport = FailingTransport(self.transport.pages)
+        client = craigslist.Client(transport, retries=0)
+        cache = craigslist.DetailCache()
+        posts = [{'link': link} for link in links]
+
+        details = craigslist.fetch_details(posts, client=client, cache=cache)
+        del transport.requested[:]
+        craigslist.fetch_details(posts, client=client, cache=cache)
+
+        self.assertEqual(details[links[1]], None)
+        self.assertEqual(details[links[0]]['latitude'], 45.4653)
+        self.assertEqual(transport.requested, [links[1]])
+
+
+if __name__ == '__main__':
+    unittest.main()
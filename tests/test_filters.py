@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+import pickle
+import unittest
+
+import craigslist
+from craigslist.client import StaticTransport
+from tests import fixtures
+
+
+class TestFilters(unittest.TestCase):
+
+    def _housing(self, filters):
+        posts = []
+        for html in fixtures.housing:
+            posts += craigslist.get_posts_for_category(
+                'hhh', fixtures.location, html, filters)
+        return [craigslist.get_post_id(post['link']) for post in posts]
+
+    def test_price_and_rooms(self):
+        """
+        Verify that numeric bounds are exclusive and that posts without the
+        field pass.
+        """
+        self.assertEqual(self._housing({'min_price': 600, 'max_price': 2300}),
+                         [3064412526])
+        self.assertEqual(self._housing({'min_rooms': 1, 'max_rooms': 4}),
+                         [3064470120, 3433985329, 3468660599])
+        self.assertEqual(self._housing({'max_sqft': 2594}),
+                         [3064470120, 3064412526, 3433985329, 3468660599])
+
+    def test_text(self):
+        self.assertEqual(self._housing({'desc': 'ALBERTA'}), [3064412526])
+        self.assertEqual(self._housing({'desc_re': r'^\$\d+ Stay'}),
+                         [3064470120])
+        self.assertEqual(self._housing({'location': 'alberta'}),
+                         [3433985329, 3468660599])
+        self.assertEqual(self._housing({'category_re': 'rooms|vacation'}),
+                         [3064470120, 3468660599])
+
+    def test_image_and_dates(self):
+        self.assertEqual(self._housing({'image': False}), [3064412526])
+        self.assertEqual(self._housing({'since': 'Dec 1'}),
+                         [3433985329, 3468660599])
+        self.assertEqual(self._housing({'until': datetime.date(2012, 6, 7)}),
+                         [3064470120, 3064412526, 3063998127])
+
+    def test_all_categories(self):
+        """
+        Verify that filters apply to for sale and job posts, not just housing.
+        """
+        posts = craigslist.get_posts_for_category(
+            'sss', fixtures.location, fixtures.for_sale[1], {'max_price': 50})
+        self.assertEqual(posts, [])
+
+        posts = craigslist.get_posts_for_category(
+            'jjj', fixtures.location, fixtures.jobs[0], {'desc': 'engineer'})
+        self.assertEqual(len(posts), 1)
+
+    def test_rows_are_rejected_before_extraction(self):
+        """
+        Verify that a title filter skips rows without calling the extractor.
+        """
+        calls = []
+        extractors = craigslist.extractors.copy()
+        craigslist.extractors[('xxx',)] = lambda item, filters: calls.append(
+            item)
+        try:
+            craigslist.get_posts_for_category(
+                'xxx', fixtures.location, fixtures.result_page(range(5)),
+                {'desc': 'nothing like this'})
+        finally:
+            craigslist.extractors.clear()
+            craigslist.extractors.update(extractors)
+
+        self.assertEqual(calls, [])
+
+    def test_title_filters_apply_to_posts(self):
+        """
+        Verify that `desc` and `desc_re` filters reject extracted posts, not
+        just result rows.
+        """
+        filters = craigslist.compile_filters({'desc': 'Yard'})
+        self.assertTrue(filters.accepts({'desc': u'House with a yard'}))
+        self.assertFalse(filters.accepts({'desc': u'Condo'}))
+
+        filters = craigslist.compile_filters({'desc_re': r'^\$\d+'})
+        self.assertTrue(filters({'desc': u'$50 laptop'}))
+        self.assertFalse(filters({'desc': u'Laptop, $50'}))
+
+    def test_unknown_filter(self):
+        self.assertRaises(ValueError, craigslist.compile_filters,
+                          {'min_pirce': 10})
+
+    def test_pickle(self):
+        filters = craigslist.compile_filters({'desc_re': 'a', 'min_price': 1})
+        filters = pickle.loads(pickle.dumps(filters))
+
+        self.assertFalse(filters.accepts({'price': 1, 'desc': u'a'}))
+        self.assertTrue(filters.accepts({'price': 2, 'desc': u'a'}))
+        self.assertFalse(filters.accepts({'price': 2, 'desc': u'b'}))
+
+    def test_search_url_arguments(self):
+        """
+        Verify that price, bedroom and picture filters are passed on to
+        Craigslist where it supports them.
+        """
+        filters = {'min_price': 500.5, 'max_price': 1000, 'min_rooms': 1,
+                   'image': True, 'desc': 'yard'}
+        url = craigslist.get_search_url(fixtures.location, 'hhh', 'house',
+                                        filters=filters)
+
+        self.assertEqual(url, fixtures.location + 'search/hhh?query=house&'
+                         'srchType=A&minAsk=500&maxAsk=1000&bedrooms=2&'
+                         'hasPic=1')
+
+        url = craigslist.get_search_url(fixtures.location, 'jjj', 'qa',
+                                        filters=filters)
+
+        self.assertEqual(url, fixtures.location +
+                         'search/jjj?query=qa&srchType=A&hasPic=1')
+
+    def test_search(self):
+        url = fixtures.search_url + '&maxAsk=3'
+        pages = {url: fixtures.result_page(range(5))}
+        client = craigslist.Client(StaticTransport(pages))
+
+        posts = craigslist.search(fixtures.location, 'sss', 'laptop',
+                                  filters={'max_price': 3}, client=client)
+
+        self.assertEqual([post['price'] for post in posts], [1.0, 2.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+import random
+import unittest
+
+import craigslist
+from craigslist.geo import distance
+
+
+class TestGeoIndex(unittest.TestCase):
+
+    def setUp(self):
+        rand = random.Random(0)
+        self.posts = [craigslist.HousingPost(
+            link='http://portland.craigslist.org/mlt/apa/%d.html' % i,
+            latitude=45.3 + rand.random() * 0.5,
+            longitude=-122.9 + rand.random() * 0.5,
+            price=float(rand.randint(500, 3000)),
+            bedrooms=rand.randint(0, 4)) for i in range(2000)]
+        self.index = craigslist.GeoIndex(self.posts)
+
+    def test_distance(self):
+        # Portland to Seattle is about 233 km.
+        self.assertAlmostEqual(distance(45.52, -122.68, 47.61, -122.33),
+                               233.6, 0)
+        self.assertEqual(distance(45.52, -122.68, 45.52, -122.68), 0)
+
+    def test_posts_without_coordinates_are_skipped(self):
+        index = craigslist.GeoIndex()
+
+        self.assertFalse(index.add(craigslist.HousingPost(price=800.0)))
+        self.assertTrue(index.add({'latitude': 45.5, 'longitude': -122.6}))
+        self.assertEqual(len(index), 1)
+
+    def test_within_matches_linear_scan(self):
+        """
+        Verify that a radius query returns the same posts as checking every
+        post, nearest first.
+        """
+        point = (45.52, -122.68)
+        expected = sorted(
+            (distance(point[0], point[1], p['latitude'], p['longitude']), p)
+            for p in self.posts)
+        expected = [p for d, p in expected if d <= 2]
+
+        result = self.index.within(point[0], point[1], 2)
+
+        self.assertTrue(len(result) > 0)
+        self.assertEqual(result, expected)
+
+    def test_within_with_filters(self):
+        filters = {'min_rooms': 1, 'max_rooms': 3, 'max_price': 1500}
+        result = self.index.within(45.52, -122.68, 5, filters)
+        everything = self.index.within(45.52, -122.68, 5)
+
+        self.assertTrue(0 < len(result) < len(everything))
+        for post in result:
+            self.assertEqual(post['bedrooms'], 2)
+            self.assertTrue(post['price'] < 1500)
+
+    def test_in_box(self):
+        box = (45.4, -122.8, 45.5, -122.6)
+        expected = [p for p in self.posts
+                    if box[0] <= p['latitude'] <= box[2]
+                    and box[1] <= p['longitude'] <= box[3]]
+
+        self.assertEqual(self.index.in_box(*box), expected)
+
+    def test_antimeridian(self):
+        index = craigslist.GeoIndex([{'latitude': 0.0, 'longitude': 179.99},
+                                     {'latitude': 0.0, 'longitude': -179.99},
+                                     {'latitude': 0.0, 'longitude': 0.0}])
+
+        self.assertEqual(len(index.within(0.0, 179.995, 5)), 2)
+        self.assertEqual(len(index.in_box(-1, 179, 1, -179)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
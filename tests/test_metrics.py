@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import craigslist
+from craigslist.client import StaticTransport
+from tests import fixtures
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.client = craigslist.Client(StaticTransport(
+            fixtures.result_pages(3)))
+        self.metrics = craigslist.Metrics()
+
+    def _search(self, filters=None):
+        return craigslist.search(fixtures.location, 'sss', 'laptop',
+                                 filters=filters, client=self.client,
+                                 metrics=self.metrics)
+
+    def test_counters(self):
+        self._search({'desc_re': '[0-5]$'})
+        counters = self.metrics.counters
+
+        self.assertEqual(counters['pages_fetched'], 3)
+        self.assertEqual(counters['rows_parsed'], 9)
+        self.assertEqual(counters['posts_extracted'], 6)
+        self.assertEqual(counters['rows_filtered'], 3)
+        self.assertEqual(counters['cache_hits'], 0)
+        self.assertEqual(counters['bytes_downloaded'], sum(
+            len(html) for html in fixtures.result_pages(3).values()))
+        self.assertEqual(self.metrics.timings['fetch_seconds'][0], 3)
+        self.assertEqual(self.metrics.timings['parse_seconds'][0], 3)
+        self.assertEqual(self.metrics.timings['extract_seconds'][0], 3)
+        self.assertTrue(self.metrics.extract_seconds_per_row() >= 0)
+
+    def test_hooks(self):
+        """
+        Verify that subclasses can receive events through the `on_*` methods.
+        """
+        fetched = []
+
+        class Hooks(craigslist.Metrics):
+            def on_fetch(self, url, seconds, response):
+                fetched.append(url)
+
+        self.metrics = Hooks()
+        self._search()
+
+        self.assertEqual(fetched[0], fixtures.search_url)
+        self.assertEqual(len(fetched), 3)
+
+    def test_prometheus(self):
+        self._search()
+        text = self.metrics.to_prometheus()
+
+        self.assertTrue('\ncraigslist_pages_fetched_total 3\n' in text)
+        self.assertTrue('# TYPE craigslist_fetch_seconds summary\n' in text)
+        self.assertTrue('\ncraigslist_fetch_seconds_count 3\n' in text)
+
+    def test_statsd(self):
+        self._search()
+        lines = self.metrics.to_statsd('cl')
+
+        self.assertTrue('cl.rows_parsed:9|c' in lines)
+        self.assertTrue('cl.parse_ms.count:3|c' in lines)
+
+        self.metrics.reset()
+        self.assertTrue('cl.rows_parsed:0|c' in self.metrics.to_statsd('cl'))
+
+
+if __name__ == '__main__':
+    unittest.main()
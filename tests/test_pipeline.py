@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import craigslist
+from craigslist.client import StaticTransport
+from tests import fixtures
+
+
+class TestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        pages = fixtures.result_pages(4)
+        pages[craigslist.get_search_url(fixtures.location, 'hhh', 'house')] = (
+            fixtures.housing[1])
+        self.client = craigslist.Client(StaticTransport(pages))
+        self.searches = [(fixtures.location, 'sss', 'laptop'),
+                         (fixtures.location, 'hhh', 'house'),
+                         (fixtures.location, 'jjj', 'missing')]
+
+    def test_search_pipeline(self):
+        """
+        Verify that `craigslist.search_pipeline` finds the same posts as
+        `craigslist.search_many`.
+        """
+        expected = craigslist.search_many(self.searches, client=self.client)
+        result = craigslist.search_pipeline(self.searches, fetchers=2,
+                                            processes=2, queue_size=2,
+                                            client=self.client)
+
+        self.assertEqual(result, expected)
+        self.assertEqual(len(result[self.searches[0]]), 12)
+        self.assertEqual(result[self.searches[1]][0]['bedrooms'], 1)
+        self.assertEqual(result[self.searches[2]], None)
+
+    def test_fetch_errors_are_raised(self):
+        """
+        Verify that an error fetching a page is raised by
+        `craigslist.search_pipeline`.
+        """
+        transport = StaticTransport({})
+
+        def get(url, **kwargs):
+            raise ValueError(url)
+
+        transport.get = get
+
+        self.assertRaises(ValueError, craigslist.search_pipeline,
+                          self.searches, processes=1,
+                          client=craigslist.Client(transport))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+import pickle
+import unittest
+
+import craigslist
+
+
+class TestRecords(unittest.TestCase):
+
+    def setUp(self):
+        self.post = craigslist.HousingPost(date='Jun  7', price=800.0,
+                                           bedrooms=1)
+
+    def test_dict_access(self):
+        """
+        Verify that records can be used like the dicts extractors returned.
+        """
+        self.assertEqual(self.post['price'], 800.0)
+        self.assertTrue('bedrooms' in self.post)
+        self.assertFalse('sqft' in self.post)
+        self.assertEqual(self.post.get('sqft', 0), 0)
+        self.assertRaises(KeyError, lambda: self.post['sqft'])
+        self.assertEqual(dict(self.post), {'date': 'Jun  7', 'price': 800.0,
+                                           'bedrooms': 1})
+        self.assertEqual(self.post, dict(self.post))
+
+    def test_unknown_fields(self):
+        def set_field():
+            self.post['color'] = 'red'
+
+        self.assertRaises(KeyError, set_field)
+        self.assertRaises(KeyError, craigslist.Post, bedrooms=1)
+
+    def test_pickle(self):
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            post = pickle.loads(pickle.dumps(self.post, protocol))
+
+            self.assertEqual(post, self.post)
+            self.assertTrue(isinstance(post, craigslist.HousingPost))
+
+    def test_no_instance_dict(self):
+        self.assertFalse(hasattr(self.post, '__dict__'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import craigslist
+from tests import fixtures
+
+
+class TestParserParity(unittest.TestCase):
+    """
+    Verify that the 'fast' parser extracts exactly what the 'soup' parser
+    does from every fixture.
+    """
+
+    def _expect_parity(self, category, html):
+        soup = craigslist.get_posts_for_category(category, fixtures.location,
+                                                 html, parser='soup')
+        fast = craigslist.get_posts_for_category(category, fixtures.location,
+                                                 html, parser='fast')
+
+        self.assertTrue(soup)
+        self.assertEqual(fast, soup)
+
+    def test_for_sale(self):
+        for html in fixtures.for_sale:
+            self._expect_parity('sss', html)
+
+    def test_jobs(self):
+        for html in fixtures.jobs:
+            self._expect_parity('jjj', html)
+
+    def test_gigs(self):
+        for html in fixtures.gigs:
+            self._expect_parity('ggg', html)
+
+    def test_housing(self):
+        for html in fixtures.housing:
+            self._expect_parity('hhh', html)
+
+    def test_result_page(self):
+        self._expect_parity('sss', fixtures.result_page(range(100)))
+
+    def test_next_page_url(self):
+        html = fixtures.result_page(range(3), fixtures.search_url + '&s=3')
+        soup = craigslist.parse_page(html, 'soup')
+        fast = craigslist.parse_page(html, 'fast')
+
+        self.assertEqual(fast[1], fixtures.search_url + '&s=3')
+        self.assertEqual(fast[1], soup[1])
+
+    def test_not_a_search_page(self):
+        html = '<html><body><blockquote></blockquote></body></html>'
+
+        self.assertEqual(craigslist.parse_page(html, 'fast'), None)
+        self.assertEqual(craigslist.parse_page(html, 'soup'), None)
+
+
+class TestRowParser(unittest.TestCase):
+
+    def test_rows_outside_second_blockquote_are_ignored(self):
+        html = ('<p class="row"><a href="a">a</a></p>'
+                '<blockquote><p class="row"><a href="b">b</a></p></blockquote>'
+                '<blockquote><p class="row"><a href="c">c</a></p></blockquote>'
+                '<blockquote><p class="row"><a href="d">d</a></p></blockquote>')
+
+        rows, next_url = craigslist.parse_rows(html)
+
+        self.assertEqual([row.find('a').get('href') for row in rows], ['c'])
+        self.assertEqual(next_url, None)
+
+    def test_entities(self):
+        rows, next_url = craigslist.parse_rows(fixtures.housing[2])
+
+        self.assertEqual(rows[0].find('a').text,
+                         u'$295000 / 4br - 2594ft\xb2 - Beautiful 4 '
+                         'Bedroom With Hardwoods')
+
+
+if __name__ == '__main__':
+    unittest.main()
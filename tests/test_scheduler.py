@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+import unittest
+
+import craigslist
+from craigslist.client import StaticTransport
+from craigslist.scheduler import Scheduler, get_priority
+from tests import fixtures
+
+
+class TestScheduler(unittest.TestCase):
+
+    def test_rate_limit(self):
+        """
+        Verify that requests to one host are paced, and that other hosts
+        aren't held up by it.
+        """
+        scheduler = Scheduler(rate=50, burst=1)
+        start = time.time()
+
+        for i in range(6):
+            scheduler.acquire('http://portland.craigslist.org/')
+        scheduler.acquire('http://seattle.craigslist.org/')
+
+        self.assertTrue(0.09 < time.time() - start < 0.5)
+
+    def test_priority(self):
+        """
+        Verify that waiting first pages go before deep pagination pages.
+        """
+        scheduler = Scheduler(rate=20, burst=1)
+        scheduler.acquire(fixtures.search_url)
+        order = []
+
+        def request(url):
+            scheduler.acquire(url)
+            order.append(get_priority(url))
+
+        threads = []
+        for offset in (300, 100, 0, 200):
+            url = fixtures.search_url + ('&s=%d' % offset if offset else '')
+            threads.append(threading.Thread(target=request, args=(url,)))
+            threads[-1].start()
+            time.sleep(0.005)
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(order, [0, 100, 200, 300])
+
+    def test_slowdown(self):
+        """
+        Verify that errors slow a host down and successes speed it back up.
+        """
+        scheduler = Scheduler(rate=10, speedup=1)
+        url = 'http://portland.craigslist.org/'
+
+        scheduler.done(url, 429)
+        self.assertEqual(scheduler.get_host(url).rate, 5)
+        scheduler.done(url, 503)
+        scheduler.done(url)
+        self.assertEqual(scheduler.get_host(url).rate, 1.25)
+        scheduler.done(url, 200)
+        self.assertEqual(scheduler.get_host(url).rate, 2.25)
+        scheduler.done(url, 404)
+        self.assertEqual(scheduler.get_host('http://seattle.craigslist.org/')
+                         .rate, 10)
+
+    def test_client(self):
+        """
+        Verify that a `Client` with a scheduler sends every request through
+        it.
+        """
+        acquired = []
+        scheduler = Scheduler(rate=1000)
+        scheduler.acquire = acquired.append
+        client = craigslist.Client(StaticTransport(fixtures.result_pages(3)),
+                                   scheduler=scheduler)
+
+        craigslist.search(fixtures.location, 'sss', 'laptop', client=client)
+
+        self.assertEqual(len(acquired), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
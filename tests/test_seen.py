@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import craigslist
+from craigslist.client import StaticTransport
+from tests import fixtures
+
+
+class TestSeenIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = StaticTransport(fixtures.result_pages(5))
+        self.client = craigslist.Client(self.transport)
+        self.index = craigslist.SeenIndex()
+
+    def _new_posts(self):
+        return list(craigslist.iter_new_posts(
+            fixtures.location, 'sss', 'laptop', self.index,
+            client=self.client))
+
+    def test_get_post_id(self):
+        self.assertEqual(craigslist.get_post_id(
+            'http://portland.craigslist.org/clk/sys/3058025999.html'),
+            3058025999)
+        self.assertEqual(craigslist.get_post_id('/sys/'), None)
+
+    def test_first_poll_finds_every_post(self):
+        posts = self._new_posts()
+
+        self.assertEqual(len(posts), 15)
+        self.assertEqual(len(self.index), 15)
+        self.assertTrue(3000000000 in self.index)
+
+    def test_later_polls_stop_at_first_seen_page(self):
+        """
+        Verify that once every post has been seen, polling fetches one page
+        and finds nothing.
+        """
+        self._new_posts()
+        del self.transport.requested[:]
+
+        self.assertEqual(self._new_posts(), [])
+        self.assertEqual(len(self.transport.requested), 1)
+
+    def test_only_new_posts_are_yielded(self):
+        """
+        Verify that new posts at the top of the results are found, and that
+        pagination stops at the first page with nothing new.
+        """
+        self._new_posts()
+        pages = fixtures.result_pages(5)
+        pages[fixtures.search_url] = fixtures.result_page(
+            [3000000100, 3000000000, 3000000001], fixtures.search_url + '&s=3')
+        self.transport.pages = pages
+        del self.transport.requested[:]
+
+        posts = self._new_posts()
+
+        self.assertEqual([craigslist.get_post_id(post['link'])
+                          for post in posts], [3000000100])
+        self.assertEqual(len(self.transport.requested), 2)
+
+    def test_filtered_polls_stop_at_first_seen_page(self):
+        """
+        Verify that a filter no post passes still lets polling stop at the
+        first page once every post has been seen.
+        """
+        def new_posts():
+            return list(craigslist.iter_new_posts(
+                fixtures.location, 'sss', 'laptop', self.index,
+                filters={'desc': 'nothing like this'}, client=self.client))
+
+        self.assertEqual(new_posts(), [])
+        self.assertEqual(len(self.index), 15)
+        del self.transport.requested[:]
+
+        self.assertEqual(new_posts(), [])
+        self.assertEqual(len(self.transport.requested), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
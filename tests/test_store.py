@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import craigslist
+from tests import fixtures
+
+
+def housing(id, price, bedrooms, date='Jun  7', desc=u'Sunny apartment'):
+    post = craigslist.HousingPost(
+        link='http://portland.craigslist.org/mlt/apa/%d.html' % id,
+        date=date, desc=desc, location=u'(Alberta)',
+        category=u'apts/housing for rent', image=bool(id % 2))
+    if price is not None:
+        post['price'] = price
+        post['bedrooms'] = bedrooms
+    return post
+
+
+class TestPostStore(unittest.TestCase):
+
+    def setUp(self):
+        self.store = craigslist.PostStore(batch_size=2)
+        self.posts = [housing(1, 800.0, 1), housing(2, 1400.0, 2, 'Jun 12'),
+                      housing(3, 2100.0, 3, 'Jul  1', u'Large house'),
+                      housing(4, None, None, 'Jul  2')]
+        self.store.put(self.posts)
+
+    def ids(self, posts):
+        return [craigslist.get_post_id(post['link']) for post in posts]
+
+    def test_round_trip(self):
+        """
+        Verify that stored posts come back as the records they were, with
+        missing fields still missing.
+        """
+        self.assertEqual(len(self.store), 4)
+        self.assertEqual(self.store.query(), self.posts)
+        self.assertTrue(isinstance(self.store.get(1), craigslist.HousingPost))
+        self.assertFalse('price' in self.store.get(4))
+        self.assertEqual(self.store.get(5), None)
+
+    def test_extracted_posts(self):
+        for category, pages in (('sss', fixtures.for_sale),
+                                ('hhh', fixtures.housing)):
+            for html in pages:
+                posts = craigslist.get_posts_for_category(
+                    category, fixtures.location, html)
+                self.store.put(posts)
+
+                for post in posts:
+                    self.assertEqual(self.store.get(craigslist.get_post_id(
+                        post['link'])), post)
+
+    def test_upsert(self):
+        """
+        Verify that storing a post again updates it, keeping when it was
+        first seen.
+        """
+        first_seen = self.store.db.execute(
+            'SELECT first_seen FROM posts WHERE id = 2').fetchone()[0]
+
+        self.store.put([housing(2, 1300.0, 2, 'Jun 12')])
+
+        self.assertEqual(len(self.store), 4)
+        self.assertEqual(self.store.get(2)['price'], 1300.0)
+        self.assertEqual(self.store.db.execute(
+            'SELECT first_seen FROM posts WHERE id = 2').fetchone()[0],
+            first_seen)
+
+    def test_posts_without_dates(self):
+        post = craigslist.Post(
+            link='http://portland.craigslist.org/mlt/sys/5.html', price=5.0)
+
+        self.assertEqual(self.store.put([post]), 1)
+        self.assertEqual(self.store.get(5), post)
+        self.assertEqual(craigslist.store.get_day(None), None)
+
+    def test_posts_without_ids_are_skipped(self):
+        self.assertEqual(self.store.put([{'link': '/sys/', 'price': 5.0}]), 0)
+        self.assertEqual(len(self.store), 4)
+
+    def test_query_filters(self):
+        query = lambda filters: self.ids(self.store.query(filters))
+
+        self.assertEqual(query({'min_price': 900, 'max_price': 2000}), [2, 4])
+        self.assertEqual(query({'min_rooms': 1}), [2, 3, 4])
+        self.assertEqual(query({'image': True}), [1, 3])
+        self.assertEqual(query({'desc': 'HOUSE'}), [3])
+        self.assertEqual(query({'desc_re': '^Sun'}), [1, 2, 4])
+        self.assertEqual(query({'since': 'Jun 10', 'until': 'Jul 1'}), [2, 3])
+        self.assertEqual(query(craigslist.Filter({'category': '100%'})), [])
+        self.assertEqual(self.store.count({'max_price': 1000}), 2)
+
+    def test_query_order_and_slice(self):
+        query = self.store.query
+
+        self.assertEqual(self.ids(query(order_by='-price')), [3, 2, 1, 4])
+        self.assertEqual(self.ids(query(order_by='day', limit=2, offset=1)),
+                         [2, 3])
+        self.assertRaises(ValueError, query, order_by='price; DROP')
+
+    def test_reopen(self):
+        path = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(path, 'posts.db')
+            craigslist.PostStore(filename).put(self.posts)
+
+            self.assertEqual(craigslist.PostStore(filename).query(),
+                             self.posts)
+        finally:
+            shutil.rmtree(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
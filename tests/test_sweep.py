@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import craigslist
+from craigslist import sweep
+from craigslist.client import StaticTransport
+from tests import fixtures
+
+
+laptops = (fixtures.location, 'sss', 'laptop')
+
+
+class TestSweep(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'sweep.db')
+        self.transport = StaticTransport(fixtures.result_pages(5))
+        self.client = craigslist.Client(self.transport)
+        self.sweep = craigslist.Sweep(self.path)
+        self.sweep.add([laptops])
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def ids(self, results):
+        return [craigslist.get_post_id(post['link']) - 3000000000
+                for search, post in results]
+
+    def test_run(self):
+        results = list(self.sweep.run('a', client=self.client))
+
+        self.assertEqual(self.ids(results), range(15))
+        self.assertEqual(results[0][0], laptops)
+        self.assertEqual(self.sweep.progress(), {'done': 1})
+        self.assertEqual(self.sweep.db.execute(
+            'SELECT offset FROM pages ORDER BY offset').fetchall(),
+            [(0,), (3,), (6,), (9,), (12,)])
+        self.assertEqual(list(self.sweep.run('a', client=self.client)), [])
+
+    def test_resume(self):
+        """
+        Verify that a sweep stopped part way through a page resumes at that
+        page, in a new process, yielding only what wasn't yielded before.
+        """
+        results = self.sweep.run('a', client=self.client)
+        first = [next(results) for i in range(7)]
+        results.close()
+        del self.transport.requested[:]
+
+        resumed = list(craigslist.Sweep(self.path).run(
+            'a', client=self.client))
+
+        self.assertEqual(self.ids(first), range(7))
+        self.assertEqual(self.ids(resumed), range(7, 15))
+        self.assertEqual(self.transport.requested[0],
+                         fixtures.search_url + '&s=6')
+
+    def test_emitted_posts_are_not_yielded_again(self):
+        """
+        Verify that posts already yielded for a search aren't yielded again
+        when a page is fetched again, like after a crash between yielding a
+        page and finishing it.
+        """
+        results = self.sweep.run('a', client=self.client)
+        for i in range(6):
+            next(results)
+        next(results)
+        results.close()
+        self.sweep.db.execute('UPDATE searches SET next_url = ?',
+                              (fixtures.search_url,))
+
+        resumed = list(self.sweep.run('a', client=self.client))
+
+        self.assertEqual(self.ids(resumed), range(7, 15))
+
+    def test_workers_share_searches(self):
+        """
+        Verify that workers with their own connections, like separate
+        processes, split the searches between them and find every post once.
+        """
+        self.sweep.add([(fixtures.location, 'sss', 'desk'),
+                        (fixtures.location, 'sss', 'chair')])
+        workers = [craigslist.Sweep(self.path).run(name, client=self.client)
+                   for name in ('a', 'b')]
+        results = []
+
+        while workers:
+            for worker in list(workers):
+                try:
+                    results.append(next(worker))
+                except StopIteration:
+                    workers.remove(worker)
+
+        self.assertEqual(sorted(self.ids(results)), range(15))
+        self.assertEqual(self.sweep.progress(), {'done': 3})
+        self.assertEqual(sorted(set(row[0] for row in self.sweep.db.execute(
+            'SELECT worker FROM searches'))), ['a', 'b'])
+
+    def test_sharding(self):
+        """
+        Verify that each search is claimed by one worker, and that a search
+        whose worker went away is claimed again once its lease is up.
+        """
+        other = (fixtures.location, 'sss', 'desk')
+        self.sweep.add([other, laptops])
+        second = craigslist.Sweep(self.path)
+
+        self.assertEqual(self.sweep.claim('a')[1], laptops)
+        self.assertEqual(second.claim('b')[1], other)
+        self.assertEqual(second.claim('c'), None)
+
+        expired = craigslist.Sweep(self.path, lease=0)
+        self.assertEqual(expired.claim('c')[1], laptops)
+        self.assertFalse(self.sweep.checkpoint(1, 'a', 0, [], None))
+        self.assertTrue(self.sweep.checkpoint(1, 'c', 0, [], None))
+        self.assertEqual(self.sweep.progress(), {'running': 1, 'done': 1})
+
+    def test_resume_after_crash_with_default_name(self):
+        """
+        Verify that a process restarted after a crash, under its default
+        worker name, takes over the search its dead predecessor held.
+        """
+        process = subprocess.Popen([sys.executable, '-c', 'pass'])
+        process.wait()
+        dead = '%s:%d' % (sweep.get_host_name(), process.pid)
+
+        results = self.sweep.run(dead, client=self.client)
+        first = [next(results) for i in range(4)]
+        del results
+
+        resumed = list(craigslist.Sweep(self.path).run(client=self.client))
+
+        self.assertEqual(self.ids(first + resumed), range(15))
+        self.assertEqual(self.sweep.progress(), {'done': 1})
+
+    def test_live_workers_keep_their_searches(self):
+        alive = '%s:%d' % (sweep.get_host_name(), os.getppid())
+        self.assertEqual(self.sweep.claim(alive)[1], laptops)
+
+        self.assertEqual(list(craigslist.Sweep(self.path).run(
+            client=self.client)), [])
+        self.assertEqual(self.sweep.progress(), {'running': 1})
+
+    def test_wait(self):
+        """
+        Verify that a waiting `run` claims a search held by another worker
+        once its lease is up, rather than returning.
+        """
+        expiring = craigslist.Sweep(self.path, lease=0.2)
+        self.assertEqual(expiring.claim('b')[1], laptops)
+        interval = sweep.POLL_INTERVAL
+        sweep.POLL_INTERVAL = 0.05
+
+        try:
+            results = list(expiring.run('a', client=self.client, wait=True))
+        finally:
+            sweep.POLL_INTERVAL = interval
+
+        self.assertEqual(self.ids(results), range(15))
+        self.assertEqual(self.sweep.progress(), {'done': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
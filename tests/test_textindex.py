@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import craigslist
+from craigslist.textindex import QueryError
+
+
+posts = [
+    craigslist.HousingPost(
+        link='http://portland.craigslist.org/mlt/apa/1.html',
+        desc=u'Sunny studio near Alberta Arts', location=u'(Alberta)',
+        category=u'apts/housing for rent', price=800.0, bedrooms=0),
+    craigslist.HousingPost(
+        link='http://portland.craigslist.org/mlt/apa/2.html',
+        desc=u'Large 2br house, sunny yard', location=u'(Sellwood)',
+        category=u'apts/housing for rent', price=1400.0, bedrooms=2),
+    craigslist.HousingPost(
+        link='http://portland.craigslist.org/mlt/apa/3.html',
+        desc=u'Arts district loft, large windows', location=u'(Pearl)',
+        category=u'apts/housing for rent', price=2100.0, bedrooms=2),
+    craigslist.Post(
+        link='http://portland.craigslist.org/mlt/sys/4.html',
+        desc=u'Dell laptop, large screen', location=u'(Alberta)',
+        category=u'computers - by owner', price=300.0)
+]
+
+
+class TestTextIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = craigslist.TextIndex(posts)
+
+    def search(self, query, filters=None):
+        return [craigslist.get_post_id(post['link'])
+                for post in self.index.search(query, filters)]
+
+    def test_and(self):
+        self.assertEqual(self.search('large'), [2, 3, 4])
+        self.assertEqual(self.search('LARGE sunny'), [2])
+
+    def test_or(self):
+        self.assertEqual(self.search('studio OR loft'), [1, 3])
+        self.assertEqual(self.search('large sunny OR studio'), [1, 2])
+        self.assertEqual(self.search('large (sunny OR loft)'), [2, 3])
+
+    def test_not(self):
+        self.assertEqual(self.search('large -laptop'), [2, 3])
+        self.assertEqual(self.search('-large'), [1])
+
+    def test_phrase(self):
+        self.assertEqual(self.search('"alberta arts"'), [1])
+        self.assertEqual(self.search('"arts alberta"'), [])
+        self.assertEqual(self.search('"for rent" large'), [2, 3])
+
+    def test_fields(self):
+        self.assertEqual(self.search('alberta'), [1, 4])
+        self.assertEqual(self.search('location:alberta'), [1, 4])
+        self.assertEqual(self.search('desc:alberta'), [1])
+        self.assertEqual(self.search('category:"by owner"'), [4])
+
+    def test_filters(self):
+        """
+        Verify that text queries combine with numeric filters, like "2br
+        under $1500".
+        """
+        self.assertEqual(self.search('large housing', {
+            'min_rooms': 1, 'max_price': 1500}), [2])
+
+    def test_posts_are_indexed_once(self):
+        self.assertFalse(self.index.add(posts[0]))
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(self.search('studio'), [1])
+
+    def test_bad_queries(self):
+        for query in ('', '(large', 'large)', '()', 'large OR'):
+            self.assertRaises(QueryError, self.index.search, query)
+
+
+if __name__ == '__main__':
+    unittest.main()